@@ -2,13 +2,32 @@
 Video preview handling with frame navigation and checkerboard backgrounds.
 """
 
+import base64
 import cv2
 import numpy as np
-from PIL import Image, ImageTk
+import tkinter as tk
 from typing import Optional, Tuple, Callable
 import customtkinter as ctk
 
-from processing.chroma_key import ChromaKeyProcessor, ChromaKeySettings
+from processing.chroma_key import (
+    ChromaKeyProcessor,
+    ChromaKeySettings,
+    create_checkerboard,
+    create_solid_background,
+)
+from processing.video_io import open_capture
+
+
+def rgb_to_photoimage(rgb: np.ndarray) -> tk.PhotoImage:
+    """
+    Build a Tk PhotoImage straight from an RGB array.
+    
+    Tk parses binary PPM natively, so this skips the numpy -> PIL -> ImageTk
+    round trip (ImageTk itself goes through PPM on most platforms).
+    """
+    h, w = rgb.shape[:2]
+    ppm = f"P6\n{w} {h}\n255\n".encode() + rgb.tobytes()
+    return tk.PhotoImage(data=base64.b64encode(ppm).decode("ascii"))
 
 
 class VideoPreview:
@@ -24,6 +43,8 @@ class VideoPreview:
         self._cap: Optional[cv2.VideoCapture] = None
         self._frame_cache: dict[int, np.ndarray] = {}
         self._max_cache_size = 10
+        self._next_frame = 0  # Index the capture will decode next without seeking
+        self._preview_out: Optional[np.ndarray] = None  # Reused blend output buffer
         
         self._video_info = {
             'width': 0,
@@ -43,7 +64,8 @@ class VideoPreview:
         self._frame_cache.clear()
         
         self._video_path = video_path
-        self._cap = cv2.VideoCapture(video_path)
+        self._cap = open_capture(video_path)
+        self._next_frame = 0
         
         if not self._cap.isOpened():
             raise ValueError(f"Cannot open video: {video_path}")
@@ -73,12 +95,17 @@ class VideoPreview:
         if frame_number in self._frame_cache:
             return self._frame_cache[frame_number]
         
-        # Seek and read
-        self._cap.set(cv2.CAP_PROP_POS_FRAMES, frame_number)
+        # Seek and read. Playback and stepping forward ask for the frame
+        # right after the last one read, which needs no seek; seeking makes
+        # the decoder restart from the previous keyframe.
+        if frame_number != self._next_frame:
+            self._cap.set(cv2.CAP_PROP_POS_FRAMES, frame_number)
         ret, frame = self._cap.read()
         
         if not ret:
+            self._next_frame = -1  # Position unknown; seek next time
             return None
+        self._next_frame = frame_number + 1
         
         # Cache the frame
         if len(self._frame_cache) >= self._max_cache_size:
@@ -91,17 +118,7 @@ class VideoPreview:
     
     def create_checkerboard(self, height: int, width: int) -> np.ndarray:
         """Create a checkerboard pattern for transparency preview."""
-        checkerboard = np.zeros((height, width, 3), dtype=np.uint8)
-        size = self.checkerboard_size
-        
-        for i in range(0, height, size):
-            for j in range(0, width, size):
-                if (i // size + j // size) % 2 == 0:
-                    checkerboard[i:i+size, j:j+size] = [200, 200, 200]
-                else:
-                    checkerboard[i:i+size, j:j+size] = [150, 150, 150]
-        
-        return checkerboard
+        return create_checkerboard(height, width, self.checkerboard_size)
     
     def create_preview(
         self,
@@ -138,15 +155,12 @@ class VideoPreview:
             ref_frame = self.get_frame(ref_frame_idx)
             
             if ref_frame is not None:
-                # Stabilize the full frame (bounding box is in original frame space)
-                frame = stabilizer.preview_stabilization(
-                    frame, frame_number, draw_tracking_point=False, first_frame=ref_frame
+                # Stabilize the full frame (bounding box is in original frame space).
+                # The frame stays BGR; the transparent border comes back as a
+                # separate (read-only) alpha mask for the blend below.
+                frame, stab_alpha = stabilizer.preview_stabilization_with_alpha(
+                    frame, frame_number, first_frame=ref_frame
                 )
-                    
-            # If stabilization returned BGRA, extract and preserve alpha for later
-            if len(frame.shape) > 2 and frame.shape[2] == 4:
-                stab_alpha = frame[:, :, 3].copy()
-                frame = cv2.cvtColor(frame, cv2.COLOR_BGRA2BGR)
         
         # Apply crop AFTER stabilization (this crops away the transparent borders)
         if crop:
@@ -177,37 +191,34 @@ class VideoPreview:
         # If we have stabilization alpha (transparent borders), apply it to the preview
         if stab_alpha is not None:
             h, w = preview.shape[:2]
-            alpha = stab_alpha.astype(float) / 255.0
-            alpha = alpha[:, :, np.newaxis]  # Add channel dim
+            alpha = stab_alpha.astype(np.float32)
+            alpha *= 1.0 / 255.0
             
             if show_checkerboard:
                 # Blend with checkerboard pattern
                 background = self.create_checkerboard(h, w)
             elif bg_color:
-                # Create solid color background
-                # Parse hex color
-                hex_color = bg_color.lstrip('#')
-                r = int(hex_color[0:2], 16)
-                g = int(hex_color[2:4], 16)
-                b = int(hex_color[4:6], 16)
-                background = np.full((h, w, 3), [b, g, r], dtype=np.uint8)  # BGR
+                # Solid color background (cached per color and frame size)
+                background = create_solid_background(h, w, bg_color)
             else:
                 # Default to black if somehow neither is set
                 background = np.zeros((h, w, 3), dtype=np.uint8)
             
-            # Blend preview with background using stabilization alpha
-            preview = (preview * alpha + background * (1 - alpha)).astype(np.uint8)
+            # Blend preview with background using stabilization alpha.
+            # blendLinear is SIMD-optimized and takes single-channel weights
+            # that apply to every color channel; write into a reused buffer.
+            if self._preview_out is None or self._preview_out.shape != preview.shape:
+                self._preview_out = np.empty_like(preview)
+            cv2.blendLinear(preview, background, alpha, 1.0 - alpha, dst=self._preview_out)
+            preview = self._preview_out
         
         return preview
     
-    def frame_to_photoimage(self, frame: np.ndarray) -> ImageTk.PhotoImage:
+    def frame_to_photoimage(self, frame: np.ndarray) -> tk.PhotoImage:
         """Convert BGR frame to PhotoImage for Tkinter display."""
         # Convert BGR to RGB
         rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        
-        # Convert to PIL Image and then to PhotoImage
-        pil_image = Image.fromarray(rgb)
-        return ImageTk.PhotoImage(image=pil_image)
+        return rgb_to_photoimage(rgb)
     
     def close(self):
         """Release video resources."""
@@ -220,8 +231,6 @@ class VideoPreview:
         self.close()
 
 
-import tkinter as tk
-
 class PreviewWidget(ctk.CTkFrame):
     """
     A preview widget that displays processed video frames with enhanced styling.
@@ -233,7 +242,9 @@ class PreviewWidget(ctk.CTkFrame):
         
         self.preview = VideoPreview(max_height=max_height)
         self._current_image = None
-        self._pil_image = None  # Store original PIL image for zooming
+        self._preview_rgb: Optional[np.ndarray] = None  # Original RGB preview for zooming
+        self._cached_photo_at_1x = None  # PhotoImage of _preview_rgb at zoom 1.0
+        self._cached_photo_source = None  # Array the cached PhotoImage was built from
         self._is_drop_target = False
         
         # Zoom and Pan state
@@ -333,7 +344,7 @@ class PreviewWidget(ctk.CTkFrame):
     
     def _on_configure(self, event):
         """Handle canvas resize."""
-        if self._pil_image:
+        if self._preview_rgb is not None:
             self._redraw_image()
     
     def load_video(self, video_path: str) -> dict:
@@ -378,15 +389,16 @@ class PreviewWidget(ctk.CTkFrame):
         prev_h, prev_w = preview_frame.shape[:2]
         self._preview_scale = prev_w / orig_w if orig_w > 0 else 1.0
         
-        # Convert to PIL Image and store it
-        rgb = cv2.cvtColor(preview_frame, cv2.COLOR_BGR2RGB)
-        self._pil_image = Image.fromarray(rgb)
+        # Convert to RGB and store it
+        self._preview_rgb = cv2.cvtColor(preview_frame, cv2.COLOR_BGR2RGB)
+        self._cached_photo_at_1x = None
+        self._cached_photo_source = None
         
         self._redraw_image()
         
     def _redraw_image(self):
         """Redraw the image on the canvas with current zoom and pan."""
-        if self._pil_image is None:
+        if self._preview_rgb is None:
             return
             
         # Get canvas size
@@ -396,16 +408,23 @@ class PreviewWidget(ctk.CTkFrame):
         if canvas_width <= 1 or canvas_height <= 1:
             return
 
-        # Calculate new dimensions
-        orig_width, orig_height = self._pil_image.size
-        new_width = int(orig_width * self._zoom_level)
-        new_height = int(orig_height * self._zoom_level)
-        
-        # Resize image (use efficient resizing)
-        # For performance, only resize if changed significantly or if zoom is standard
-        resized = self._pil_image.resize((new_width, new_height), Image.Resampling.NEAREST) # Nearest for speed during zoom
-        
-        self._current_image = ImageTk.PhotoImage(resized)
+        if abs(self._zoom_level - 1.0) < 1e-6:
+            # At 1x no resampling is needed; reuse the PhotoImage across pan ticks
+            if self._cached_photo_source is not self._preview_rgb:
+                self._cached_photo_at_1x = rgb_to_photoimage(self._preview_rgb)
+                self._cached_photo_source = self._preview_rgb
+            self._current_image = self._cached_photo_at_1x
+        else:
+            # Calculate new dimensions
+            orig_height, orig_width = self._preview_rgb.shape[:2]
+            new_width = max(1, int(orig_width * self._zoom_level))
+            new_height = max(1, int(orig_height * self._zoom_level))
+            
+            # Resize image (nearest for speed during zoom)
+            resized = cv2.resize(
+                self._preview_rgb, (new_width, new_height), interpolation=cv2.INTER_NEAREST
+            )
+            self._current_image = rgb_to_photoimage(resized)
         
         # Calculate centered position + pan
         x = (canvas_width // 2) + self._pan_x
@@ -513,7 +532,9 @@ class PreviewWidget(ctk.CTkFrame):
         """Clear the preview."""
         self.canvas.delete("all")
         self._current_image = None
-        self._pil_image = None
+        self._preview_rgb = None
+        self._cached_photo_at_1x = None
+        self._cached_photo_source = None
         self.canvas.grid_remove()
         self.empty_state.grid()
         self.preview.close()
@@ -524,14 +545,14 @@ class PreviewWidget(ctk.CTkFrame):
     
     def _canvas_to_image_coords(self, canvas_x: int, canvas_y: int) -> Optional[Tuple[int, int]]:
         """Convert canvas coordinates to original video frame coordinates."""
-        if self._pil_image is None:
+        if self._preview_rgb is None:
             return None
         
         canvas_width = self.canvas.winfo_width()
         canvas_height = self.canvas.winfo_height()
         
         # Preview image size (displayed on canvas)
-        preview_width, preview_height = self._pil_image.size
+        preview_height, preview_width = self._preview_rgb.shape[:2]
         
         # Current image center on canvas
         center_x = (canvas_width // 2) + self._pan_x
@@ -622,7 +643,7 @@ class PreviewWidget(ctk.CTkFrame):
     
     def _draw_tracking_marker(self):
         """Draw a bounding box marker for the tracking region."""
-        if self._pil_image is None:
+        if self._preview_rgb is None:
             return
         
         # Skip drawing canvas marker if stabilization is active
@@ -644,7 +665,7 @@ class PreviewWidget(ctk.CTkFrame):
         center_x = (canvas_width // 2) + self._pan_x
         center_y = (canvas_height // 2) + self._pan_y
         
-        orig_width, orig_height = self._pil_image.size
+        orig_height, orig_width = self._preview_rgb.shape[:2]
         zoom_width = orig_width * self._zoom_level
         zoom_height = orig_height * self._zoom_level
         
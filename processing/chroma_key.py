@@ -2,10 +2,26 @@
 Core chroma key processing algorithms.
 """
 
+import os
+import sys
 import cv2
 import numpy as np
-from dataclasses import dataclass
-from typing import Tuple, Optional
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from functools import lru_cache
+from typing import Iterable, Iterator, Tuple, Optional
+
+from processing.video_io import HAS_CUDA
+
+# Make sure OpenCV dispatches to its SIMD code paths
+cv2.setUseOptimized(True)
+
+# Feather amount from which apply_feathering switches to iterated box blurs
+BOX_FEATHER_MIN = 10
+
+# Largest Gaussian kernel the CUDA filter accepts
+CUDA_MAX_GAUSSIAN_KSIZE = 31
 
 
 @dataclass
@@ -22,6 +38,104 @@ class ChromaKeySettings:
     defringe_transparent: float = 0.0  # For semi-transparent areas like fins
     erode_size: int = 1
     dilate_size: int = 1
+    half_res_mask: bool = False  # Build the mask at half resolution (faster, softer edges)
+    use_gpu: bool = False  # Build the mask with cv2.cuda when a CUDA device is present
+
+
+@lru_cache(maxsize=8)
+def create_checkerboard(height: int, width: int, size: int = 10) -> np.ndarray:
+    """
+    Create a BGR checkerboard pattern for transparency preview.
+    
+    The pattern only depends on its dimensions, so it is built once with
+    vectorized indexing and cached. The returned array is read-only.
+    
+    Args:
+        height: Pattern height in pixels
+        width: Pattern width in pixels
+        size: Edge length of each square in pixels
+        
+    Returns:
+        BGR checkerboard of shape (height, width, 3)
+    """
+    palette = np.array([[200, 200, 200], [150, 150, 150]], dtype=np.uint8)
+    rows = np.arange(height) // size
+    cols = np.arange(width) // size
+    checkerboard = palette[(rows[:, None] + cols[None, :]) & 1]
+    checkerboard.flags.writeable = False
+    return checkerboard
+
+
+@lru_cache(maxsize=32)
+def hex_to_bgr(hex_color: str) -> Tuple[int, int, int]:
+    """Parse a hex color string (e.g., '#FF0000') into a BGR tuple."""
+    hex_color = hex_color.lstrip('#')
+    r = int(hex_color[0:2], 16)
+    g = int(hex_color[2:4], 16)
+    b = int(hex_color[4:6], 16)
+    return (b, g, r)
+
+
+@lru_cache(maxsize=4)
+def create_solid_background(height: int, width: int, hex_color: str) -> np.ndarray:
+    """
+    Create a solid BGR background for preview blending.
+    
+    Cached per (height, width, color); the returned array is read-only.
+    
+    Args:
+        height: Background height in pixels
+        width: Background width in pixels
+        hex_color: Hex color string (e.g., '#FF0000')
+        
+    Returns:
+        BGR image of shape (height, width, 3)
+    """
+    background = np.full((height, width, 3), hex_to_bgr(hex_color), dtype=np.uint8)
+    background.flags.writeable = False
+    return background
+
+
+def zero_transparent(rgba: np.ndarray) -> None:
+    """
+    Zero every channel of fully transparent pixels, in place.
+    
+    Encoders compress the uniform color far better than whatever the key
+    left behind under alpha 0.
+    
+    Args:
+        rgba: 4-channel uint8 frame with alpha last (RGBA or BGRA)
+    """
+    if sys.byteorder == "little" and rgba.flags.c_contiguous:
+        # Read each pixel as one uint32: alpha is the top byte, so the
+        # pixel is opaque at all exactly when the word exceeds 0x00FFFFFF
+        pixels = rgba.view(np.uint32)[..., 0]
+        np.multiply(pixels, pixels > 0x00FFFFFF, out=pixels, casting="unsafe")
+    else:
+        transparent = cv2.compare(cv2.extractChannel(rgba, 3), 0, cv2.CMP_EQ)
+        cv2.bitwise_xor(rgba, rgba, dst=rgba, mask=transparent)
+
+
+@lru_cache(maxsize=16)
+def _ellipse_kernel(size: int) -> np.ndarray:
+    """Return a cached, read-only elliptical structuring element of size x size."""
+    kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (size, size))
+    kernel.flags.writeable = False
+    return kernel
+
+
+@lru_cache(maxsize=16)
+def _cuda_morphology_filter(op: int, size: int):
+    """Return a cached CUDA erode/dilate filter with an elliptical kernel."""
+    return cv2.cuda.createMorphologyFilter(op, cv2.CV_8UC1, _ellipse_kernel(size))
+
+
+@lru_cache(maxsize=16)
+def _cuda_gaussian_filter(kernel_size: int):
+    """Return a cached CUDA Gaussian filter for single-channel masks."""
+    return cv2.cuda.createGaussianFilter(
+        cv2.CV_8UC1, cv2.CV_8UC1, (kernel_size, kernel_size), 0
+    )
 
 
 class ChromaKeyProcessor:
@@ -42,16 +156,21 @@ class ChromaKeyProcessor:
         Returns:
             Alpha mask (0-255) where 255 is fully opaque
         """
+        # cvtColor + inRange are both SIMD kernels; a precomputed BGR lookup
+        # table measured several times slower here because NumPy has to build
+        # the 24-bit index and gather from a 16 MB table per frame.
         hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
         
-        lower = np.array([self.settings.h_min, self.settings.s_min, self.settings.v_min])
-        upper = np.array([self.settings.h_max, self.settings.s_max, self.settings.v_max])
+        # Plain tuples are passed to OpenCV as scalars, with no per-frame
+        # array allocation and nothing to go stale if the settings change
+        lower = (self.settings.h_min, self.settings.s_min, self.settings.v_min)
+        upper = (self.settings.h_max, self.settings.s_max, self.settings.v_max)
         
         # Create mask where green is white
-        green_mask = cv2.inRange(hsv, lower, upper)
+        alpha = cv2.inRange(hsv, lower, upper)
         
-        # Invert so foreground (non-green) is white
-        alpha = cv2.bitwise_not(green_mask)
+        # Invert in place so foreground (non-green) is white
+        cv2.bitwise_not(alpha, dst=alpha)
         
         return alpha
     
@@ -65,20 +184,20 @@ class ChromaKeyProcessor:
         Returns:
             Refined alpha mask
         """
+        # Erode followed by dilate with the same kernel is a morphological
+        # opening, which OpenCV runs as one call
+        if self.settings.erode_size > 0 and self.settings.erode_size == self.settings.dilate_size:
+            kernel = _ellipse_kernel(self.settings.erode_size * 2 + 1)
+            return cv2.morphologyEx(mask, cv2.MORPH_OPEN, kernel)
+        
         # Erode to remove green fringe
         if self.settings.erode_size > 0:
-            kernel = cv2.getStructuringElement(
-                cv2.MORPH_ELLIPSE, 
-                (self.settings.erode_size * 2 + 1, self.settings.erode_size * 2 + 1)
-            )
+            kernel = _ellipse_kernel(self.settings.erode_size * 2 + 1)
             mask = cv2.erode(mask, kernel, iterations=1)
         
         # Dilate to recover subject edges
         if self.settings.dilate_size > 0:
-            kernel = cv2.getStructuringElement(
-                cv2.MORPH_ELLIPSE,
-                (self.settings.dilate_size * 2 + 1, self.settings.dilate_size * 2 + 1)
-            )
+            kernel = _ellipse_kernel(self.settings.dilate_size * 2 + 1)
             mask = cv2.dilate(mask, kernel, iterations=1)
         
         return mask
@@ -99,11 +218,89 @@ class ChromaKeyProcessor:
         # Calculate blur kernel size (must be odd)
         kernel_size = self.settings.feather * 2 + 1
         
-        # Apply Gaussian blur for smooth edges
-        feathered = cv2.GaussianBlur(mask, (kernel_size, kernel_size), 0)
+        if self.settings.feather < BOX_FEATHER_MIN:
+            # Apply Gaussian blur for smooth edges
+            return cv2.GaussianBlur(mask, (kernel_size, kernel_size), 0)
+        
+        # For wide feathers, three box blurs approximate the Gaussian at a
+        # cost independent of the radius. n passes of width w have variance
+        # n * (w^2 - 1) / 12, so pick w to match the sigma GaussianBlur
+        # derives from this kernel size.
+        sigma = 0.3 * ((kernel_size - 1) * 0.5 - 1) + 0.8
+        box_size = int(round(np.sqrt(4 * sigma * sigma + 1))) | 1
+        
+        feathered = mask
+        for _ in range(3):
+            feathered = cv2.blur(feathered, (box_size, box_size))
         
         return feathered
     
+    def build_mask(self, frame: np.ndarray) -> np.ndarray:
+        """
+        Create, refine and feather the alpha mask for a frame.
+        
+        With ``half_res_mask`` enabled the mask stages run on a pyrDown'd
+        copy of the frame with halved kernel sizes, and the result is
+        pyrUp'd back to full size. The mask is a smooth signal after
+        feathering, so this trades a little edge detail for roughly a
+        quarter of the work.
+        
+        Args:
+            frame: BGR frame from OpenCV
+            
+        Returns:
+            Alpha mask (0-255) at the frame's resolution
+        """
+        if not self.settings.half_res_mask:
+            if self.settings.use_gpu and HAS_CUDA:
+                return self._build_mask_gpu(frame)
+            mask = self.create_mask(frame)
+            mask = self.refine_mask(mask)
+            return self.apply_feathering(mask)
+        
+        h, w = frame.shape[:2]
+        small = cv2.pyrDown(frame)
+        
+        # Halve the kernel sizes (rounding up) to match the smaller frame
+        half = ChromaKeyProcessor(replace(
+            self.settings,
+            erode_size=(self.settings.erode_size + 1) // 2,
+            dilate_size=(self.settings.dilate_size + 1) // 2,
+            feather=(self.settings.feather + 1) // 2,
+            half_res_mask=False,
+        ))
+        mask = half.build_mask(small)
+        
+        return cv2.pyrUp(mask, dstsize=(w, h))
+    
+    def _build_mask_gpu(self, frame: np.ndarray) -> np.ndarray:
+        """
+        CUDA version of create_mask -> refine_mask -> apply_feathering.
+        
+        The frame is uploaded once and only the finished mask is downloaded.
+        Feather sizes beyond the CUDA Gaussian limit fall back to the CPU blur.
+        """
+        s = self.settings
+        gpu_frame = cv2.cuda_GpuMat()
+        gpu_frame.upload(frame)
+        
+        hsv = cv2.cuda.cvtColor(gpu_frame, cv2.COLOR_BGR2HSV)
+        green_mask = cv2.cuda.inRange(
+            hsv, (s.h_min, s.s_min, s.v_min), (s.h_max, s.s_max, s.v_max)
+        )
+        mask = cv2.cuda.bitwise_not(green_mask)
+        
+        if s.erode_size > 0:
+            mask = _cuda_morphology_filter(cv2.MORPH_ERODE, s.erode_size * 2 + 1).apply(mask)
+        if s.dilate_size > 0:
+            mask = _cuda_morphology_filter(cv2.MORPH_DILATE, s.dilate_size * 2 + 1).apply(mask)
+        
+        kernel_size = s.feather * 2 + 1
+        if s.feather > 0 and kernel_size <= CUDA_MAX_GAUSSIAN_KSIZE:
+            return _cuda_gaussian_filter(kernel_size).apply(mask).download()
+        
+        return self.apply_feathering(mask.download())
+    
     def suppress_spill(self, frame: np.ndarray, mask: np.ndarray) -> np.ndarray:
         """
         Remove green color spill from the subject edges.
@@ -116,44 +313,52 @@ class ChromaKeyProcessor:
             mask: Alpha mask (used to find edge regions)
             
         Returns:
-            BGR frame with spill suppression applied
+            BGR frame with spill suppression applied (``frame`` itself if
+            there is nothing to suppress)
         """
         if self.settings.spill_suppression <= 0:
             return frame
         
         # Find edge region (where spill is most visible)
-        kernel_size = 5
-        kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (kernel_size, kernel_size))
+        kernel = _ellipse_kernel(5)
         
-        # Edge is where mask transitions (dilated - eroded)
-        dilated = cv2.dilate(mask, kernel, iterations=2)
-        eroded = cv2.erode(mask, kernel, iterations=2)
-        edge_mask = cv2.subtract(dilated, eroded)
+        # Edge is where mask transitions (dilated - eroded), computed as a
+        # single morphological gradient
+        edge_mask = cv2.morphologyEx(mask, cv2.MORPH_GRADIENT, kernel, iterations=2)
         
-        # Convert to float for processing
-        frame_float = frame.astype(np.float32)
+        # Only pixels under the edge mask change. Solid screen and solid
+        # subject areas are copied through, and the work below is limited
+        # to the edge region's bounding box.
+        x, y, w, h = cv2.boundingRect(edge_mask)
+        if w == 0 or h == 0:
+            return frame
+        result = frame.copy()
+        roi = result[y:y+h, x:x+w]
+        edge_mask = edge_mask[y:y+h, x:x+w]
         
-        # Split channels
-        b, g, r = cv2.split(frame_float)
+        # Split channels. Everything below stays in uint8: OpenCV's
+        # arithmetic saturates, which takes care of the clamping.
+        b, g, r = cv2.split(roi)
         
         # Calculate spill amount (how much greener than average of R and B)
-        avg_rb = (r + b) / 2
-        spill = np.maximum(0, g - avg_rb)
+        avg_rb = cv2.addWeighted(r, 0.5, b, 0.5, 0)
+        spill = cv2.subtract(g, avg_rb)
         
         # Apply suppression weighted by edge mask and setting
-        edge_weight = edge_mask.astype(np.float32) / 255.0
-        suppression_amount = spill * self.settings.spill_suppression * edge_weight
+        suppression_amount = cv2.multiply(
+            spill, edge_mask, scale=self.settings.spill_suppression / 255.0
+        )
         
         # Reduce green channel in spill areas
-        g_corrected = np.clip(g - suppression_amount, 0, 255)
+        cv2.subtract(g, suppression_amount, dst=g)
         
         # Also boost red/blue slightly to compensate
-        compensation = suppression_amount * 0.3
-        r_corrected = np.clip(r + compensation, 0, 255)
-        b_corrected = np.clip(b + compensation, 0, 255)
+        compensation = cv2.convertScaleAbs(suppression_amount, alpha=0.3)
+        cv2.add(r, compensation, dst=r)
+        cv2.add(b, compensation, dst=b)
         
-        result = cv2.merge([b_corrected, g_corrected, r_corrected])
-        return result.astype(np.uint8)
+        roi[...] = cv2.merge([b, g, r])
+        return result
     
     def defringe_transparent_areas(self, frame: np.ndarray, mask: np.ndarray) -> np.ndarray:
         """
@@ -174,10 +379,13 @@ class ChromaKeyProcessor:
         
         strength = self.settings.defringe_transparent
         
-        # Convert to float
+        # Convert to float. The steps below work in place on a handful of
+        # planes rather than allocating a new temporary for every term.
+        # The channels are views, so in-place updates land in frame_float.
         frame_float = frame.astype(np.float32)
-        b, g, r = cv2.split(frame_float)
-        alpha = mask.astype(np.float32) / 255.0
+        b, g, r = frame_float[:, :, 0], frame_float[:, :, 1], frame_float[:, :, 2]
+        alpha = mask.astype(np.float32)
+        alpha /= 255.0
         
         # === METHOD 1: Classic Despill (Green = max(R, B)) ===
         # This is the industry-standard approach used in Nuke, After Effects, etc.
@@ -187,45 +395,45 @@ class ChromaKeyProcessor:
         
         # Calculate how much to pull green down
         # In areas where green > max(R,B), there's green contamination
-        green_contamination = np.maximum(0, g - max_rb)
+        green_contamination = np.subtract(g, max_rb, out=max_rb)
+        np.maximum(green_contamination, 0, out=green_contamination)
         
         # === METHOD 2: Alpha-weighted correction ===
         # Semi-transparent areas (alpha between 0.02 and 0.98) need more correction
-        # because that's where the green screen shows through
-        semi_transparent_weight = np.where(
-            (alpha > 0.02) & (alpha < 0.98),
-            # Bell curve: maximum at 50% transparency
-            4.0 * alpha * (1.0 - alpha),  # Peaks at 0.5
-            0.0
-        )
+        # because that's where the green screen shows through.
+        # Bell curve: maximum at 50% transparency
+        combined_weight = 1.0 - alpha
+        combined_weight *= 4.0 * alpha  # Peaks at 0.5
+        combined_weight[(alpha <= 0.02) | (alpha >= 0.98)] = 0.0
         
         # Also apply to nearly-transparent areas that still have some visibility
-        edge_weight = np.where(
-            alpha < 0.3,
-            alpha * 3.0,  # Linear ramp for very transparent areas
-            0.0
-        )
+        edge_weight = alpha * 3.0  # Linear ramp for very transparent areas
+        edge_weight[alpha >= 0.3] = 0.0
         
-        combined_weight = np.maximum(semi_transparent_weight, edge_weight)
+        np.maximum(combined_weight, edge_weight, out=combined_weight)
         
         # === Apply green removal ===
-        # Base removal: always apply despill to contaminated areas
-        base_removal = green_contamination * strength
-        
         # Extra removal for semi-transparent areas
-        extra_removal = green_contamination * combined_weight * strength * 2.0
+        total_removal = np.multiply(green_contamination, combined_weight, out=combined_weight)
+        total_removal *= strength
+        total_removal *= 2.0
         
-        total_removal = base_removal + extra_removal
+        # Base removal: always apply despill to contaminated areas
+        green_contamination *= strength
+        total_removal += green_contamination
         
         # Clamp green channel
-        g_new = np.clip(g - total_removal, 0, 255)
+        g_new = np.subtract(g, total_removal, out=g)
+        np.clip(g_new, 0, 255, out=g_new)
         
         # === Color compensation ===
         # When we remove green, also shift toward red/magenta to counter the green tint
         # This makes the result look more natural
         compensation = total_removal * 0.4
-        r_new = np.clip(r + compensation * 0.6, 0, 255)  # Add some red
-        b_new = np.clip(b + compensation * 0.4, 0, 255)  # Add some blue
+        r_new = np.add(r, compensation * 0.6, out=r)  # Add some red
+        np.clip(r_new, 0, 255, out=r_new)
+        b_new = np.add(b, compensation * 0.4, out=b)  # Add some blue
+        np.clip(b_new, 0, 255, out=b_new)
         
         # === Additional: Force green <= max(R,B) in semi-transparent areas ===
         # This is a hard clamp that guarantees no green spill
@@ -234,26 +442,37 @@ class ChromaKeyProcessor:
             # Only apply in semi-transparent and transparent areas
             force_mask = (alpha < 0.95).astype(np.float32)
             g_clamped = np.minimum(g_new, max_rb_new)
-            g_new = g_new * (1 - force_mask * (strength - 0.5) * 2) + g_clamped * (force_mask * (strength - 0.5) * 2)
-            g_new = np.clip(g_new, 0, 255)
+            g_blend = g_new * (1 - force_mask * (strength - 0.5) * 2) + g_clamped * (force_mask * (strength - 0.5) * 2)
+            np.clip(g_blend, 0, 255, out=g_new)
         
-        result = cv2.merge([b_new, g_new, r_new])
-        return result.astype(np.uint8)
+        return frame_float.astype(np.uint8)
     
-    def process_frame(self, frame: np.ndarray) -> np.ndarray:
+    def process_frame(
+        self,
+        frame: np.ndarray,
+        out: Optional[np.ndarray] = None,
+        alpha: Optional[np.ndarray] = None,
+        clear_transparent: bool = False,
+        bgra: bool = False
+    ) -> np.ndarray:
         """
         Process a single frame to remove chroma key background.
         
         Args:
             frame: BGR frame from OpenCV
+            out: Optional C-contiguous (h, w, 4) uint8 array to write the
+                 result into, so callers can reuse one buffer across frames
+            alpha: Optional (h, w) uint8 mask ANDed into the key's alpha,
+                   e.g. the transparent borders left by stabilization
+            clear_transparent: Zero the color of fully transparent pixels
+            bgra: Keep OpenCV's BGR channel order (BGRA output), e.g. for
+                  cv2.imwrite
             
         Returns:
-            RGBA frame with alpha channel
+            RGBA frame with alpha channel (``out`` if it was usable)
         """
         # Create and refine mask
-        mask = self.create_mask(frame)
-        mask = self.refine_mask(mask)
-        mask = self.apply_feathering(mask)
+        mask = self.build_mask(frame)
         
         # Apply spill suppression (edge-based)
         processed_frame = self.suppress_spill(frame, mask)
@@ -261,23 +480,81 @@ class ChromaKeyProcessor:
         # Apply transparent defringe (alpha-based)
         processed_frame = self.defringe_transparent_areas(processed_frame, mask)
         
-        # Convert BGR to RGB and add alpha
-        r, g, b = cv2.split(processed_frame)[::-1]  # Reverse for RGB
-        b_ch, g_ch, r_ch = cv2.split(processed_frame)
-        
-        rgba = np.dstack((r_ch, g_ch, b_ch, mask))
+        # Alpha work is done on the single-channel plane, before it is
+        # interleaved into the RGBA output
+        if alpha is not None:
+            mask = cv2.bitwise_and(mask, alpha)
+        
+        # Convert BGR to RGB and add alpha in a single pass:
+        # OpenCV is BGR, output should be RGBA
+        h, w = mask.shape[:2]
+        # mixChannels needs a contiguous destination, so views into a larger
+        # array (e.g. a slice of a canvas) get a fresh buffer instead
+        if (
+            out is not None
+            and out.shape == (h, w, 4)
+            and out.dtype == np.uint8
+            and out.flags.c_contiguous
+        ):
+            rgba = out
+        else:
+            rgba = np.empty((h, w, 4), dtype=np.uint8)
+        if bgra:
+            from_to = [0, 0, 1, 1, 2, 2, 3, 3]
+        else:
+            from_to = [2, 0,   # R
+                       1, 1,   # G
+                       0, 2,   # B
+                       3, 3]   # A (mask)
+        cv2.mixChannels([processed_frame, mask], [rgba], from_to)
         
-        # Wait, we need RGB not BGR for output
-        # Re-order properly: OpenCV is BGR, output should be RGB
-        rgba = np.dstack((
-            processed_frame[:, :, 2],  # R
-            processed_frame[:, :, 1],  # G  
-            processed_frame[:, :, 0],  # B
-            mask
-        ))
+        if clear_transparent:
+            zero_transparent(rgba)
         
         return rgba
     
+    def process_frames(
+        self,
+        frames: Iterable[np.ndarray],
+        max_workers: Optional[int] = None,
+        threads_per_frame: int = 1
+    ) -> Iterator[np.ndarray]:
+        """
+        Process a stream of frames on a thread pool, yielding results in order.
+        
+        OpenCV releases the GIL inside its kernels, so several frames can be
+        keyed at once on multi-core machines. At most two frames per worker
+        are kept in flight to bound memory use.
+        
+        OpenCV's own thread pool is limited to ``threads_per_frame`` while
+        this runs (the setting is process-wide and restored afterwards), so
+        frame-level and pixel-level parallelism don't oversubscribe the CPU.
+        
+        Args:
+            frames: Iterable of BGR frames
+            max_workers: Number of worker threads (defaults to the CPU count)
+            threads_per_frame: OpenCV threads each frame may use
+            
+        Yields:
+            RGBA frames, in the same order as the input
+        """
+        workers = max_workers or os.cpu_count() or 1
+        previous_threads = cv2.getNumThreads()
+        cv2.setNumThreads(threads_per_frame)
+        
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                pending = deque()
+                for frame in frames:
+                    pending.append(pool.submit(self.process_frame, frame))
+                    if len(pending) >= workers * 2:
+                        yield pending.popleft().result()
+                
+                while pending:
+                    yield pending.popleft().result()
+        finally:
+            cv2.setNumThreads(previous_threads)
+    
     def preview_frame(self, frame: np.ndarray, show_checkerboard: bool = True, bg_color: Optional[str] = None) -> np.ndarray:
         """
         Create a preview of the processed frame with optional checkerboard or solid color background.
@@ -290,9 +567,7 @@ class ChromaKeyProcessor:
         Returns:
             BGR frame for display
         """
-        mask = self.create_mask(frame)
-        mask = self.refine_mask(mask)
-        mask = self.apply_feathering(mask)
+        mask = self.build_mask(frame)
         
         processed = self.suppress_spill(frame, mask)
         processed = self.defringe_transparent_areas(processed, mask)
@@ -300,42 +575,17 @@ class ChromaKeyProcessor:
         h, w = frame.shape[:2]
         
         if bg_color:
-            # Use solid color background (parse hex color)
-            # Convert hex to BGR
-            hex_color = bg_color.lstrip('#')
-            r = int(hex_color[0:2], 16)
-            g = int(hex_color[2:4], 16)
-            b = int(hex_color[4:6], 16)
-            
-            background = np.zeros((h, w, 3), dtype=np.uint8)
-            background[:] = [b, g, r]  # BGR format
-            
-            # Blend based on alpha
-            alpha_normalized = mask.astype(np.float32) / 255.0
-            alpha_3ch = np.dstack([alpha_normalized] * 3)
-            
-            result = (processed.astype(np.float32) * alpha_3ch + 
-                     background.astype(np.float32) * (1 - alpha_3ch))
-            return result.astype(np.uint8)
+            # Use solid color background (cached per color and frame size)
+            background = create_solid_background(h, w, bg_color)
         elif show_checkerboard:
-            # Create checkerboard pattern
-            check_size = 10
-            
-            checkerboard = np.zeros((h, w, 3), dtype=np.uint8)
-            for i in range(0, h, check_size):
-                for j in range(0, w, check_size):
-                    if (i // check_size + j // check_size) % 2 == 0:
-                        checkerboard[i:i+check_size, j:j+check_size] = [200, 200, 200]
-                    else:
-                        checkerboard[i:i+check_size, j:j+check_size] = [150, 150, 150]
-            
-            # Blend based on alpha
-            alpha_normalized = mask.astype(np.float32) / 255.0
-            alpha_3ch = np.dstack([alpha_normalized] * 3)
-            
-            result = (processed.astype(np.float32) * alpha_3ch + 
-                     checkerboard.astype(np.float32) * (1 - alpha_3ch))
-            return result.astype(np.uint8)
+            # Checkerboard pattern (cached per frame size)
+            background = create_checkerboard(h, w)
         else:
             # Just mask out the green
             return cv2.bitwise_and(processed, processed, mask=mask)
+        
+        # Blend based on alpha. blendLinear takes single-channel weights
+        # that apply to every color channel and runs in one SIMD pass.
+        alpha = mask.astype(np.float32)
+        alpha *= 1.0 / 255.0
+        return cv2.blendLinear(processed, background, alpha, 1.0 - alpha)
@@ -5,10 +5,48 @@ Uses template matching to track a user-selected bounding box across frames
 and computes translation offsets to stabilize the video around that anchor region.
 """
 
+import hashlib
+import os
+import threading
 import cv2
 import numpy as np
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait
+from contextlib import contextmanager
 from dataclasses import dataclass
-from typing import Optional, Tuple, List, Callable
+from functools import lru_cache
+from typing import Optional, Tuple, List, Callable, Iterable, Sequence
+
+from processing.video_io import HAS_CUDA, HAS_OPENCL, DecodeWorker, open_capture, read_frame_at
+
+# Coarse-to-fine matching never shrinks the template below this size (pixels)
+MIN_PYRAMID_TEMPLATE_SIZE = 16
+MAX_PYRAMID_LEVELS = 2
+
+# How many times analysis doubles the search margin before giving up on a frame
+MAX_SEARCH_WIDENINGS = 4
+
+# Template adaptation: how many recent matched patches are kept as fallbacks,
+# how fast the running template follows them, and how far above the match
+# threshold a match must score before it is trusted to update the template
+TEMPLATE_HISTORY = 5
+TEMPLATE_ADAPT_RATE = 0.1
+TEMPLATE_ADAPT_MARGIN = 0.1
+
+# Reference-point marker drawn by preview_stabilization (half-length, line width)
+CROSSHAIR_SIZE = 15
+CROSSHAIR_THICKNESS = 2
+
+# Parallel analysis never splits the video into chunks shorter than this (frames)
+MIN_ANALYSIS_CHUNK = 100
+
+# Gaussian sigma, in frames, of trajectory smoothing at smoothing = 1.0
+MAX_SMOOTHING_SIGMA = 30.0
+
+# Frames whose tracked region dHash differs by fewer bits than this reuse the
+# previous box without running template matching. Even a few differing bits
+# can hide a small shift of the region, so only identical hashes qualify.
+STATIC_HASH_DISTANCE = 1
 
 
 @dataclass
@@ -18,9 +56,15 @@ class StabilizationSettings:
     bounding_box: Optional[Tuple[int, int, int, int]] = None  # (x, y, w, h) region to track
     reference_frame_idx: int = 0  # Frame index where the bounding box was selected
     border_mode: str = "transparent"  # "transparent", "replicate", "crop"
-    smoothing: float = 0.0  # Future: trajectory smoothing (0 = raw, 1 = max smooth)
+    smoothing: float = 0.0  # Trajectory smoothing (0 = raw, 1 = max smooth)
     match_threshold: float = 0.5  # Tracking confidence threshold (0.0-1.0)
     search_margin: int = 50  # Pixels to search around last position
+    use_gpu: bool = False  # Run template matching through CUDA or OpenCL when available
+    analysis_stride: int = 1  # Track every Nth frame during analysis, interpolate the rest
+    adapt_template: bool = False  # Follow gradual appearance changes of the tracked region
+    skip_static_frames: bool = False  # Reuse the last box while the tracked region is unchanged
+    analysis_max_width: int = 0  # Track on frames downscaled to this width (0 = full resolution)
+    analysis_workers: int = 1  # Track this many chunks of the video in parallel
     
     @property
     def tracking_point(self) -> Optional[Tuple[int, int]]:
@@ -31,6 +75,106 @@ class StabilizationSettings:
         return None
 
 
+def _shift_integer(
+    frame: np.ndarray,
+    dx: int,
+    dy: int,
+    out: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """
+    Translate a frame by whole pixels, filling the uncovered border with zeros.
+    Writes into ``out`` (same shape and dtype as frame) when given.
+    """
+    h, w = frame.shape[:2]
+    if out is None:
+        shifted = np.zeros_like(frame)
+    else:
+        # Only the uncovered border needs clearing; the rest is overwritten
+        shifted = out
+        shifted[:max(0, dy)] = 0
+        shifted[h - max(0, -dy):] = 0
+        shifted[:, :max(0, dx)] = 0
+        shifted[:, w - max(0, -dx):] = 0
+    if abs(dx) >= w or abs(dy) >= h:
+        return shifted
+    
+    shifted[max(0, dy):h - max(0, -dy), max(0, dx):w - max(0, -dx)] = \
+        frame[max(0, -dy):h - max(0, dy), max(0, -dx):w - max(0, dx)]
+    return shifted
+
+
+@lru_cache(maxsize=8)
+def _border_alpha(height: int, width: int, shift_x: int, shift_y: int) -> np.ndarray:
+    """
+    Alpha mask of a frame translated by whole pixels: 255 where image content
+    lands, 0 in the uncovered border. Callers pass the rounded offset so
+    sub-pixel and smoothed offsets share one cached, read-only mask.
+    """
+    opaque = np.full((height, width), 255, dtype=np.uint8)
+    alpha = _shift_integer(opaque, shift_x, shift_y)
+    alpha.flags.writeable = False
+    return alpha
+
+
+def _dhash(gray: np.ndarray) -> int:
+    """64-bit difference hash of a grayscale image (8x8 horizontal gradients)."""
+    small = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA)
+    bits = np.packbits(small[:, 1:] > small[:, :-1])
+    return int.from_bytes(bits.tobytes(), "big")
+
+
+@contextmanager
+def _opencl_enabled(enabled: bool):
+    """Turn OpenCL on for the calling thread, restoring its previous state on exit."""
+    if not enabled:
+        yield
+        return
+    # The flag is per thread, so each tracking thread scopes its own
+    previous = cv2.ocl.useOpenCL()
+    cv2.ocl.setUseOpenCL(True)
+    try:
+        yield
+    finally:
+        cv2.ocl.setUseOpenCL(previous)
+
+
+@lru_cache(maxsize=1)
+def _cuda_template_matcher():
+    """Return a cached CUDA TM_CCOEFF_NORMED matcher for grayscale images."""
+    return cv2.cuda.createTemplateMatching(cv2.CV_8UC1, cv2.TM_CCOEFF_NORMED)
+
+
+@lru_cache(maxsize=2)
+def _crosshair_sprite(channels: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Yellow reference-point crosshair drawn once into a small sprite, plus the
+    mask of its drawn pixels. The marker center is the sprite center.
+    Cached per channel count, read-only.
+    """
+    half = CROSSHAIR_SIZE + CROSSHAIR_THICKNESS  # Room for the line caps
+    side = 2 * half + 1
+    sprite = np.zeros((side, side, channels), dtype=np.uint8)
+    color = (0, 255, 255, 255)[:channels]  # Yellow in BGR(A)
+    
+    cv2.line(sprite, (half - CROSSHAIR_SIZE, half), (half + CROSSHAIR_SIZE, half),
+             color, CROSSHAIR_THICKNESS)
+    cv2.line(sprite, (half, half - CROSSHAIR_SIZE), (half, half + CROSSHAIR_SIZE),
+             color, CROSSHAIR_THICKNESS)
+    cv2.circle(sprite, (half, half), 8, color, CROSSHAIR_THICKNESS)
+    
+    mask = sprite.any(axis=2)
+    sprite.flags.writeable = False
+    mask.flags.writeable = False
+    return sprite, mask
+
+
+def _peak(result: np.ndarray) -> Tuple[float, Tuple[int, int]]:
+    """Max value and its (x, y) location in a matchTemplate result map."""
+    idx = int(result.argmax())
+    y, x = divmod(idx, result.shape[1])
+    return float(result.flat[idx]), (x, y)
+
+
 class PointStabilizer:
     """
     Stabilizes video by tracking a bounding box and compensating for its movement.
@@ -43,17 +187,40 @@ class PointStabilizer:
         2. Call set_bounding_box() to define the region to track
         3. Call analyze_video() to compute offsets (first pass)
         4. Call get_stabilized_frame() for each frame (second pass)
+    
+    Stabilizers hold only NumPy state and picklable settings, so several
+    clips can be analyzed in parallel processes with analyze_stabilization():
+    
+        with ProcessPoolExecutor() as pool:
+            stabilizers = list(pool.map(analyze_stabilization, paths, settings_list))
     """
     
     def __init__(self, settings: Optional[StabilizationSettings] = None):
         self.settings = settings or StabilizationSettings()
         
         # Tracking state
-        self._offsets: List[Tuple[float, float]] = []  # Per-frame (dx, dy) offsets
-        self._tracking_boxes: List[Tuple[int, int, int, int]] = []  # Tracked box per frame
+        self._offsets = np.zeros((0, 2), dtype=np.float32)  # Per-frame (dx, dy) offsets
+        self._tracking_boxes = np.zeros((0, 4), dtype=np.int32)  # Tracked (x, y, w, h) per frame
         self._analyzed = False
         self._reference_center: Optional[Tuple[float, float]] = None
-        self._template: Optional[np.ndarray] = None  # Template image for matching
+        self._template: Optional[np.ndarray] = None  # Grayscale template image for matching
+        self._analysis_key: Optional[str] = None  # Inputs the current offsets were computed from
+        self._coarse_cache: Optional[Tuple[np.ndarray, int, np.ndarray]] = None  # (template, levels, coarse)
+        self._smoothed: Optional[Tuple[np.ndarray, float, np.ndarray]] = None  # (offsets, smoothing, smoothed)
+        self._preview_template: Optional[tuple] = None  # (reference frame, bbox, template) for previews
+        self._template_umat: Optional[tuple] = None  # (template, OpenCL copy) for use_gpu matching
+        
+        # Translation matrices reused across frames; only the dx/dy entries
+        # change. The export path (apply_stabilization*) and the UI preview
+        # (preview_stabilization*) run on different threads, so each has its own.
+        self._M = np.eye(2, 3, dtype=np.float32)
+        self._preview_M = np.eye(2, 3, dtype=np.float32)
+    
+    def __getstate__(self):
+        # Device buffers cannot be pickled; they are rebuilt on demand
+        state = self.__dict__.copy()
+        state["_template_umat"] = None
+        return state
     
     @property
     def is_analyzed(self) -> bool:
@@ -87,22 +254,103 @@ class PointStabilizer:
     
     def _reset_analysis(self):
         """Clear analysis data."""
-        self._offsets = []
-        self._tracking_boxes = []
+        self._offsets = np.zeros((0, 2), dtype=np.float32)
+        self._tracking_boxes = np.zeros((0, 4), dtype=np.int32)
         self._analyzed = False
         self._reference_center = None
         self._template = None
+        self._analysis_key = None
+        self._coarse_cache = None
+        self._smoothed = None
+        self._preview_template = None
+        self._template_umat = None
+    
+    def _make_analysis_key(self, video_path: str) -> Optional[str]:
+        """
+        Hash of everything the analysis result depends on: the video file
+        (path, size, modification time) and the tracking settings.
+        Returns None if the video cannot be stat'ed.
+        """
+        try:
+            stat = os.stat(video_path)
+        except OSError:
+            return None
+        
+        s = self.settings
+        inputs = (
+            os.path.abspath(video_path), stat.st_size, stat.st_mtime_ns,
+            tuple(s.bounding_box), s.reference_frame_idx, s.match_threshold,
+            s.search_margin, s.analysis_stride, s.adapt_template, s.skip_static_frames,
+            s.analysis_max_width,
+        )
+        return hashlib.sha1(repr(inputs).encode()).hexdigest()
+    
+    def save_analysis(self, path: str) -> bool:
+        """
+        Save the analysis result to a compressed .npz file.
+        
+        Returns:
+            True if a result was written
+        """
+        if not self._analyzed or self._analysis_key is None:
+            return False
+        
+        try:
+            np.savez_compressed(
+                path,
+                key=np.array(self._analysis_key),
+                offsets=self._offsets,
+                boxes=self._tracking_boxes,
+                reference_center=np.array(self._reference_center, dtype=np.float64),
+            )
+        except OSError:
+            return False
+        return True
+    
+    def load_analysis(self, path: str, video_path: str) -> bool:
+        """
+        Load an analysis result saved by save_analysis().
+        
+        The result is only used if it was computed for the same video file
+        and tracking settings.
+        
+        Returns:
+            True if the result was loaded and the stabilizer is analyzed
+        """
+        if not self.settings.bounding_box:
+            return False
+        
+        key = self._make_analysis_key(video_path)
+        if key is None:
+            return False
+        
+        try:
+            with np.load(path) as data:
+                if str(data["key"]) != key:
+                    return False
+                offsets = data["offsets"].astype(np.float32)
+                boxes = data["boxes"].astype(np.int32)
+                reference_center = tuple(float(v) for v in data["reference_center"])
+        except (OSError, KeyError, ValueError):
+            return False
+        
+        self._offsets = offsets
+        self._tracking_boxes = boxes
+        self._reference_center = reference_center
+        self._analysis_key = key
+        self._analyzed = True
+        return True
     
     def _extract_template(self, frame: np.ndarray, bbox: Tuple[int, int, int, int]) -> np.ndarray:
-        """Extract template region from frame."""
+        """Extract grayscale template region from frame."""
         x, y, w, h = bbox
         # Ensure bounds
         h_frame, w_frame = frame.shape[:2]
         x = max(0, min(x, w_frame - w))
         y = max(0, min(y, h_frame - h))
         
-        template = frame[y:y+h, x:x+w].copy()
-        return template
+        # Matching only needs luminance, so keep the 1-channel crop
+        return cv2.cvtColor(frame[y:y+h, x:x+w], cv2.COLOR_BGR2GRAY)
     
     def _match_template(
         self, 
@@ -111,22 +359,36 @@ class PointStabilizer:
         search_region: Optional[Tuple[int, int, int, int]] = None
     ) -> Optional[Tuple[int, int, int, int]]:
         """
-        Find template in frame using template matching.
+        Find a grayscale template in frame using template matching.
         
         Returns:
             Matched bounding box (x, y, w, h) or None if no good match
         """
+        found = self._search_template(frame, template, search_region)
+        if found is None or found[1] < self.settings.match_threshold:
+            return None
+        return found[0]
+    
+    def _search_template(
+        self,
+        frame: np.ndarray,
+        template: np.ndarray,
+        search_region: Optional[Tuple[int, int, int, int]] = None
+    ) -> Optional[Tuple[Tuple[int, int, int, int], float]]:
+        """
+        Locate the best match of a grayscale template, without thresholding.
+        
+        Returns:
+            (matched box (x, y, w, h), match score) or None if the search
+            area is smaller than the template
+        """
         # Convert to grayscale for matching
         if len(frame.shape) == 3:
             frame_gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
         else:
             frame_gray = frame
-            
-        if len(template.shape) == 3:
-            template_gray = cv2.cvtColor(template, cv2.COLOR_BGR2GRAY)
-        else:
-            template_gray = template
         
+        template_gray = template
         h_template, w_template = template_gray.shape[:2]
         h_frame, w_frame = frame_gray.shape[:2]
         
@@ -152,31 +414,100 @@ class PointStabilizer:
         # Perform template matching
         if search_area.shape[0] < h_template or search_area.shape[1] < w_template:
             return None
+        
+        # Coarse-to-fine: locate the peak on a downscaled pyramid level,
+        # then only search a small window around it at full resolution
+        levels = 0
+        while (levels < MAX_PYRAMID_LEVELS and
+               min(h_template, w_template) >> (levels + 1) >= MIN_PYRAMID_TEMPLATE_SIZE):
+            levels += 1
+        
+        scale = 1 << levels
+        pad = 2 * scale  # Slack for the peak position lost to downsampling
+        if levels and (search_area.shape[0] > h_template + 2 * pad or
+                       search_area.shape[1] > w_template + 2 * pad):
+            coarse_area = search_area
+            for _ in range(levels):
+                coarse_area = cv2.pyrDown(coarse_area)
+            coarse_template = self._coarse_template(template_gray, levels)
             
-        result = cv2.matchTemplate(search_area, template_gray, cv2.TM_CCOEFF_NORMED)
-        min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(result)
+            coarse = self._correlate(coarse_area, coarse_template)
+            _, (coarse_x, coarse_y) = _peak(coarse)
+            
+            x0 = max(0, coarse_x * scale - pad)
+            y0 = max(0, coarse_y * scale - pad)
+            x1 = min(search_area.shape[1], coarse_x * scale + w_template + pad)
+            y1 = min(search_area.shape[0], coarse_y * scale + h_template + pad)
+            search_area = search_area[y0:y1, x0:x1]
+            offset_x += x0
+            offset_y += y0
         
-        # Threshold for good match
-        if max_val < self.settings.match_threshold:
-            return None
+        result = self._correlate(search_area, template_gray)
+        max_val, max_loc = _peak(result)
         
         # Get matched location
         match_x = max_loc[0] + offset_x
         match_y = max_loc[1] + offset_y
         
-        return (match_x, match_y, w_template, h_template)
+        return (match_x, match_y, w_template, h_template), max_val
+    
+    def _coarse_template(self, template: np.ndarray, levels: int) -> np.ndarray:
+        """
+        Template downscaled by `levels` pyramid steps. The last result is
+        kept, so an unchanged template is only downscaled once per analysis.
+        """
+        cached = self._coarse_cache
+        if cached is not None and cached[0] is template and cached[1] == levels:
+            return cached[2]
+        
+        coarse = template
+        for _ in range(levels):
+            coarse = cv2.pyrDown(coarse)
+        self._coarse_cache = (template, levels, coarse)
+        return coarse
+    
+    def _use_opencl(self) -> bool:
+        """Whether matching should go through OpenCL (CUDA takes precedence)."""
+        return self.settings.use_gpu and HAS_OPENCL and not HAS_CUDA
+    
+    def _correlate(self, image: np.ndarray, template: np.ndarray) -> np.ndarray:
+        """Run TM_CCOEFF_NORMED matching, on the GPU via CUDA or UMat when enabled."""
+        if self.settings.use_gpu and HAS_CUDA:
+            image_gpu = cv2.cuda_GpuMat()
+            image_gpu.upload(image)
+            template_gpu = cv2.cuda_GpuMat()
+            template_gpu.upload(template)
+            return _cuda_template_matcher().match(image_gpu, template_gpu).download()
+        if self.settings.use_gpu and HAS_OPENCL and cv2.ocl.useOpenCL():
+            # The template is the same object for every frame of an analysis,
+            # so keep its device copy instead of uploading it per call
+            cached = self._template_umat
+            if cached is not None and cached[0] is template:
+                template_umat = cached[1]
+            else:
+                template_umat = cv2.UMat(template)
+                self._template_umat = (template, template_umat)
+            result = cv2.matchTemplate(cv2.UMat(image), template_umat, cv2.TM_CCOEFF_NORMED)
+            return result.get()
+        return cv2.matchTemplate(image, template, cv2.TM_CCOEFF_NORMED)
     
     def analyze_video(
         self,
         video_path: str,
-        progress_callback: Optional[Callable[[float, str], None]] = None
+        progress_callback: Optional[Callable[[float, str], None]] = None,
+        cache_path: Optional[str] = None
     ) -> bool:
         """
         First pass: Analyze video and compute stabilization offsets using template matching.
         
+        The pass is skipped if the current result was already computed for
+        the same video and settings, or if cache_path holds a matching
+        result saved by an earlier run. A fresh result is saved to cache_path.
+        
         Args:
             video_path: Path to video file
             progress_callback: Callback(progress: 0-1, status_message)
+            cache_path: Optional .npz file to load/save the result
             
         Returns:
             True if analysis successful
@@ -184,12 +515,21 @@ class PointStabilizer:
         if not self.settings.bounding_box:
             return False
         
+        key = self._make_analysis_key(video_path)
+        if self._analyzed and key is not None and key == self._analysis_key:
+            return True
+        
         self._reset_analysis()
         
-        cap = cv2.VideoCapture(video_path)
+        if cache_path and self.load_analysis(cache_path, video_path):
+            return True
+        
+        cap = open_capture(video_path)
         if not cap.isOpened():
             return False
         
+        decoder = None
+        
         try:
             total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
             reference_frame_idx = self.settings.reference_frame_idx
@@ -197,94 +537,341 @@ class PointStabilizer:
             bbox = self.settings.bounding_box
             x, y, w, h = bbox
             
-            # Seek to reference frame to extract template
-            if reference_frame_idx > 0:
-                cap.set(cv2.CAP_PROP_POS_FRAMES, reference_frame_idx)
-            
-            ret, reference_frame = cap.read()
-            if not ret:
+            # Read the reference frame through a separate capture so the
+            # main one never has to seek back to the start afterwards
+            reference_frame = read_frame_at(video_path, reference_frame_idx)
+            if reference_frame is None:
                 return False
             
+            # Optionally track on downscaled frames; boxes and offsets are
+            # mapped back to full resolution after the pass
+            ref_h, ref_w = reference_frame.shape[:2]
+            max_width = self.settings.analysis_max_width
+            scale = max_width / ref_w if 0 < max_width < ref_w else 1.0
+            track_bbox = bbox
+            if scale < 1.0:
+                small_size = (max(1, round(ref_w * scale)), max(1, round(ref_h * scale)))
+                reference_frame = cv2.resize(reference_frame, small_size, interpolation=cv2.INTER_AREA)
+                track_bbox = (
+                    int(round(x * scale)), int(round(y * scale)),
+                    max(1, int(round(w * scale))), max(1, int(round(h * scale)))
+                )
+            
             # Extract template from reference frame
-            self._template = self._extract_template(reference_frame, bbox)
+            self._template = self._extract_template(reference_frame, track_bbox)
             
             # Calculate reference center (center of initial bounding box)
             self._reference_center = (float(x + w / 2), float(y + h / 2))
             
-            # Reset to beginning and process all frames
-            cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            tracking = (track_bbox, scale, small_size if scale < 1.0 else None)
+            stride = max(1, self.settings.analysis_stride)
+            workers = max(1, self.settings.analysis_workers)
+            chunk = max(MIN_ANALYSIS_CHUNK, -(-total_frames // workers))
+            chunk = -(-chunk // stride) * stride  # Keep the stride phase across chunks
             
-            frame_idx = 0
-            last_box = bbox
-            search_margin = 50  # Pixels to expand search area
+            # Frames tracked so far. Chunk workers only count them under a
+            # lock; progress is always reported from this thread, since GUI
+            # callbacks must not run on pool threads.
+            progress_lock = threading.Lock()
+            done = 0
             
-            while cap.isOpened():
-                ret, frame = cap.read()
-                if not ret:
-                    break
-                
-                # Define search region around last known position
-                lx, ly, lw, lh = last_box
-                search_region = (
-                    lx - search_margin,
-                    ly - search_margin,
-                    lw + 2 * search_margin,
-                    lh + 2 * search_margin
-                )
-                
-                # Find template in current frame
-                matched_box = self._match_template(frame, self._template, search_region)
-                
-                # Fallback to full frame search if tracking lost
-                if not matched_box:
-                    matched_box = self._match_template(frame, self._template, None)
-                
-                if matched_box:
-                    tx, ty, tw, th = matched_box
-                    self._tracking_boxes.append(matched_box)
-                    
-                    # Compute center of matched box
-                    tracked_center_x = tx + tw / 2
-                    tracked_center_y = ty + th / 2
-                    
-                    # Compute offset from reference center
-                    dx = self._reference_center[0] - tracked_center_x
-                    dy = self._reference_center[1] - tracked_center_y
-                    self._offsets.append((dx, dy))
-                    
-                    last_box = matched_box
+            def count_frame():
+                nonlocal done
+                with progress_lock:
+                    done += 1
+            
+            def report_progress():
+                progress = min(done / max(total_frames, 1), 1.0)
+                progress_callback(progress * 0.5, "Analyzing motion...")  # 0-50%
+            
+            def on_frame():
+                count_frame()
+                if progress_callback and done % 10 == 0:
+                    report_progress()
+            
+            boxes = None
+            if workers > 1 and total_frames > chunk:
+                # The template is fixed, so each chunk can be tracked on its
+                # own; chunks start from the reference box and re-acquire it
+                # with the widening search. Each chunk also tracks the first
+                # frame of the next one, so skipped frames at its end are
+                # interpolated rather than held. The frame count is only an
+                # estimate, so the last chunk reads on to the end of the video.
+                starts = list(range(0, total_frames, chunk))
+                with ThreadPoolExecutor(max_workers=workers) as pool:
+                    futures = [
+                        pool.submit(
+                            self._track_chunk, video_path, start,
+                            chunk + 1 if start != starts[-1] else None,
+                            tracking, count_frame
+                        )
+                        for start in starts
+                    ]
+                    pending = set(futures)
+                    while pending:
+                        _, pending = wait(pending, timeout=0.1)
+                        if progress_callback:
+                            report_progress()
+                    results = [future.result() for future in futures]
+                # Seeking can land off-frame on some containers; only trust
+                # the chunks if every one but the last decoded in full
+                if all(len(r) == chunk + 1 for r in results[:-1]) and results[-1]:
+                    boxes = [box for r in results[:-1] for box in r[:chunk]]
+                    boxes.extend(results[-1])
                 else:
-                    # Tracking lost - use previous values
-                    if self._offsets:
-                        self._offsets.append(self._offsets[-1])
-                        self._tracking_boxes.append(self._tracking_boxes[-1])
-                    else:
-                        self._offsets.append((0.0, 0.0))
-                        self._tracking_boxes.append(bbox)
-                
-                frame_idx += 1
-                
-                if progress_callback and frame_idx % 10 == 0:
-                    progress = frame_idx / total_frames
-                    progress_callback(progress * 0.5, "Analyzing motion...")  # 0-50%
+                    done = 0
+            
+            if boxes is None:
+                # Process all frames from the beginning. Decoding runs on a
+                # background thread so it overlaps with template matching.
+                decoder = DecodeWorker(cap, stride)
+                decoder.start()
+                with _opencl_enabled(self._use_opencl()):
+                    boxes = self._track_frames(decoder, tracking, on_frame)
+            
+            if not boxes:
+                return False
             
+            # Offsets move each tracked box center back onto the reference
+            # center; compute them for all frames in one vectorized step
+            tracked = np.array(boxes, dtype=np.float64).reshape(-1, 4)
+            centers = tracked[:, :2] + tracked[:, 2:] / 2
+            tx, ty, tw, th = track_bbox
+            track_center = np.array((tx + tw / 2, ty + th / 2))
+            self._offsets = ((track_center - centers) / scale).astype(np.float32)
+            if scale < 1.0:
+                tracked /= scale
+            self._tracking_boxes = np.rint(tracked).astype(np.int32)
+            self._analysis_key = key
             self._analyzed = True
+            
+            if cache_path:
+                self.save_analysis(cache_path)
             return True
             
         finally:
+            if decoder is not None:
+                decoder.stop()
             cap.release()
     
+    def _track_chunk(
+        self,
+        video_path: str,
+        start: int,
+        count: Optional[int],
+        tracking: tuple,
+        on_frame: Callable[[], None]
+    ) -> List[Tuple[float, float, float, float]]:
+        """
+        Track frames [start, start + count) through a capture of their own,
+        or from start to the end of the video if count is None.
+        """
+        cap = open_capture(video_path)
+        decoder = None
+        try:
+            if not cap.isOpened():
+                return []
+            if start > 0:
+                cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+            decoder = DecodeWorker(cap, max(1, self.settings.analysis_stride), count=count)
+            decoder.start()
+            with _opencl_enabled(self._use_opencl()):
+                return self._track_frames(decoder, tracking, on_frame)
+        finally:
+            if decoder is not None:
+                decoder.stop()
+            cap.release()
+    
+    def _track_frames(
+        self,
+        frames: Iterable[Optional[np.ndarray]],
+        tracking: tuple,
+        on_frame: Callable[[], None]
+    ) -> List[Tuple[float, float, float, float]]:
+        """
+        Track the template through a run of consecutive frames.
+        
+        Args:
+            frames: BGR frames, None for frames skipped by the analysis stride
+            tracking: (start box, scale, tracking size or None) at tracking resolution
+            on_frame: Called once per frame, for progress reporting
+            
+        Returns:
+            Tracked box per frame, at tracking resolution
+        """
+        track_bbox, scale, small_size = tracking
+        last_box = track_bbox
+        search_margin = max(1, round(self.settings.search_margin * scale))  # Pixels to expand search area
+        skipped = 0  # Frames grabbed but not decoded since the last tracked frame
+        frame_full = None  # Grayscale buffer, reused by every frame after the first
+        frame_gray = None  # Tracking-resolution view or buffer, likewise reused
+        boxes: List[Tuple[float, float, float, float]] = []  # Tracked box per frame
+        
+        # Appearance adaptation: a running average of confident matches
+        # plus the last few matched patches, tried before widening the search
+        template = self._template
+        adapt = self.settings.adapt_template
+        running = template.astype(np.float32) if adapt else None
+        history = deque(maxlen=TEMPLATE_HISTORY)
+        adapt_score = self.settings.match_threshold + TEMPLATE_ADAPT_MARGIN
+        
+        skip_static = self.settings.skip_static_frames
+        matched_hash: Optional[int] = None  # dHash of the region at the last search match
+        
+        for frame in frames:
+            on_frame()
+            
+            # None marks a frame skipped by the analysis stride
+            if frame is None:
+                skipped += 1
+                continue
+            
+            # Convert once into the reused buffer; every search attempt
+            # below uses it, and nothing keeps a view of it across frames
+            frame_full = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=frame_full)
+            if scale < 1.0:
+                frame_gray = cv2.resize(frame_full, small_size, dst=frame_gray,
+                                        interpolation=cv2.INTER_AREA)
+            else:
+                frame_gray = frame_full
+            frame_h, frame_w = frame_gray.shape[:2]
+            
+            lx, ly, lw, lh = last_box
+            
+            # If the content under the last matched box still hashes like
+            # it did when it was matched, the region has not moved
+            static = False
+            if skip_static and matched_hash is not None:
+                region_hash = _dhash(frame_gray[ly:ly+lh, lx:lx+lw])
+                static = bin(region_hash ^ matched_hash).count('1') < STATIC_HASH_DISTANCE
+            
+            matched_box = last_box if static else None
+            score = 0.0
+            if not static:
+                # Search around the last known position, doubling the margin
+                # if tracking is lost instead of jumping to a full-frame search
+                margin = search_margin
+                for attempt in range(MAX_SEARCH_WIDENINGS + 1):
+                    search_region = (
+                        lx - margin,
+                        ly - margin,
+                        lw + 2 * margin,
+                        lh + 2 * margin
+                    )
+                    found = self._search_template(frame_gray, template, search_region)
+                    
+                    # Before widening, try the recently matched patches
+                    if attempt == 0 and history and (
+                            found is None or found[1] < self.settings.match_threshold):
+                        for patch in reversed(history):
+                            candidate = self._search_template(frame_gray, patch, search_region)
+                            if candidate and (found is None or candidate[1] > found[1]):
+                                found = candidate
+                            if found and found[1] >= self.settings.match_threshold:
+                                break
+                    
+                    matched_box = None
+                    if found and found[1] >= self.settings.match_threshold:
+                        matched_box, score = found
+                    
+                    covers_frame = (lx - margin <= 0 and ly - margin <= 0 and
+                                    lx + lw + margin >= frame_w and ly + lh + margin >= frame_h)
+                    if matched_box or covers_frame:
+                        break
+                    margin *= 2
+            
+            if matched_box:
+                box = matched_box
+                last_box = matched_box
+                
+                if skip_static and not static:
+                    mx, my, mw, mh = matched_box
+                    matched_hash = _dhash(frame_gray[my:my+mh, mx:mx+mw])
+                
+                if adapt and score > adapt_score:
+                    mx, my, mw, mh = matched_box
+                    patch = frame_gray[my:my+mh, mx:mx+mw].copy()
+                    history.append(patch)
+                    cv2.accumulateWeighted(patch, running, TEMPLATE_ADAPT_RATE)
+                    template = cv2.convertScaleAbs(running)
+            elif boxes:
+                # Tracking lost - use previous values
+                box = boxes[-1]
+            else:
+                box = track_bbox
+            
+            # Fill in the frames skipped since the last tracked one
+            if skipped:
+                self._interpolate_skipped(skipped, box, boxes)
+                skipped = 0
+            
+            boxes.append(box)
+        
+        # Trailing skipped frames keep the last tracked values
+        for _ in range(skipped):
+            boxes.append(boxes[-1])
+        
+        return boxes
+    
+    @staticmethod
+    def _interpolate_skipped(
+        count: int,
+        box: Tuple[float, float, float, float],
+        boxes: List[Tuple[float, float, float, float]]
+    ):
+        """Append linearly interpolated boxes for frames skipped by the analysis stride."""
+        prev_x, prev_y, _, _ = boxes[-1]
+        x, y, w, h = box
+        
+        for k in range(1, count + 1):
+            t = k / (count + 1)
+            boxes.append((prev_x + (x - prev_x) * t, prev_y + (y - prev_y) * t, w, h))
+    
+    def _applied_offsets(self) -> np.ndarray:
+        """
+        Per-frame offsets with settings.smoothing applied.
+        
+        The raw trajectory is filtered with a Gaussian of up to
+        MAX_SMOOTHING_SIGMA frames in one vectorized pass over each axis;
+        the result is cached until the offsets or the smoothing change.
+        """
+        smoothing = self.settings.smoothing
+        offsets = self._offsets
+        if smoothing <= 0 or len(offsets) < 2:
+            return offsets
+        
+        cached = self._smoothed
+        if cached is not None and cached[0] is offsets and cached[1] == smoothing:
+            return cached[2]
+        
+        sigma = min(smoothing, 1.0) * MAX_SMOOTHING_SIGMA
+        radius = max(1, int(3 * sigma + 0.5))
+        t = np.arange(-radius, radius + 1, dtype=np.float64)
+        kernel = np.exp(-0.5 * (t / sigma) ** 2)
+        kernel /= kernel.sum()
+        
+        # Repeat the end values so the ends of the trajectory are not pulled to 0
+        padded = np.pad(offsets.astype(np.float64), ((radius, radius), (0, 0)), mode="edge")
+        smoothed = np.empty_like(offsets)
+        for axis in range(2):
+            smoothed[:, axis] = np.convolve(padded[:, axis], kernel, mode="valid")
+        
+        self._smoothed = (offsets, smoothing, smoothed)
+        return smoothed
+    
     def get_offset(self, frame_idx: int) -> Tuple[float, float]:
         """Get the stabilization offset for a specific frame."""
         if not self._analyzed or frame_idx >= len(self._offsets):
             return (0.0, 0.0)
-        return self._offsets[frame_idx]
+        dx, dy = self._applied_offsets()[frame_idx]
+        return (float(dx), float(dy))
     
     def get_tracked_box(self, frame_idx: int) -> Optional[Tuple[int, int, int, int]]:
         """Get the tracked bounding box position for a specific frame."""
         if not self._analyzed or frame_idx >= len(self._tracking_boxes):
             return self.settings.bounding_box
-        return self._tracking_boxes[frame_idx]
+        x, y, w, h = self._tracking_boxes[frame_idx]
+        return (int(x), int(y), int(w), int(h))
     
     def get_tracked_position(self, frame_idx: int) -> Optional[Tuple[float, float]]:
         """Get the tracked center point position for a specific frame."""
@@ -307,12 +894,15 @@ class PointStabilizer:
             frame_idx: Frame index (0-based)
             
         Returns:
-            Stabilized frame (same format as input, but BGRA if transparent border)
+            Stabilized frame (same format as input, but BGRA if transparent border).
+            When there is no offset to apply (not analyzed, or under half a
+            pixel) this is the input frame itself, not a copy, in its original
+            format; callers that modify the result in place must copy it first.
         """
         if not self._analyzed or frame_idx >= len(self._offsets):
             return frame
         
-        dx, dy = self._offsets[frame_idx]
+        dx, dy = self._applied_offsets()[frame_idx]
         
         if abs(dx) < 0.5 and abs(dy) < 0.5:
             return frame  # No significant offset
@@ -320,8 +910,15 @@ class PointStabilizer:
         h, w = frame.shape[:2]
         has_alpha = frame.shape[2] == 4 if len(frame.shape) > 2 else False
         
-        # Build translation matrix
-        M = np.float32([[1, 0, dx], [0, 1, dy]])
+        # Update the reusable translation matrix
+        M = self._M
+        M[0, 2] = dx
+        M[1, 2] = dy
+        
+        # Whole-pixel offsets with a zero border are just a shifted copy,
+        # so skip warpAffine's interpolation for them
+        shift_x, shift_y = int(round(dx)), int(round(dy))
+        integer_shift = abs(dx - shift_x) < 0.05 and abs(dy - shift_y) < 0.05
         
         # Determine border mode
         if self.settings.border_mode == "transparent":
@@ -330,16 +927,21 @@ class PointStabilizer:
                 frame = cv2.cvtColor(frame, cv2.COLOR_BGR2BGRA)
             
             # Apply translation with transparent border
-            stabilized = cv2.warpAffine(
-                frame, M, (w, h),
-                borderMode=cv2.BORDER_CONSTANT,
-                borderValue=(0, 0, 0, 0)
-            )
+            if integer_shift:
+                stabilized = _shift_integer(frame, shift_x, shift_y)
+            else:
+                stabilized = cv2.warpAffine(
+                    frame, M, (w, h),
+                    borderMode=cv2.BORDER_CONSTANT,
+                    borderValue=(0, 0, 0, 0)
+                )
         elif self.settings.border_mode == "replicate":
             stabilized = cv2.warpAffine(
                 frame, M, (w, h),
                 borderMode=cv2.BORDER_REPLICATE
             )
+        elif integer_shift:  # crop or unknown, whole pixels
+            stabilized = _shift_integer(frame, shift_x, shift_y)
         else:  # crop or unknown
             stabilized = cv2.warpAffine(
                 frame, M, (w, h),
@@ -349,6 +951,94 @@ class PointStabilizer:
         
         return stabilized
     
+    def apply_stabilization_with_alpha(
+        self,
+        frame: np.ndarray,
+        frame_idx: int,
+        out: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """
+        Apply stabilization, returning the transparent border as a separate mask.
+        
+        Equivalent to apply_stabilization followed by splitting the BGRA
+        result, but the frame stays 3-channel throughout: no BGR->BGRA->BGR
+        round trip, and the border mask is built once per offset and cached.
+        
+        Args:
+            frame: BGR frame
+            frame_idx: Frame index (0-based)
+            out: Optional array shaped like frame to write the shifted frame
+                 into, so callers can reuse one buffer across frames
+            
+        Returns:
+            Tuple of (stabilized BGR frame, border alpha mask or None if the
+            frame has no transparent border). The frame is ``out`` if it was
+            usable and a shift was applied.
+        """
+        if (self.settings.border_mode != "transparent" or
+                not self._analyzed or frame_idx >= len(self._offsets) or
+                (len(frame.shape) > 2 and frame.shape[2] == 4)):
+            return self.apply_stabilization(frame, frame_idx), None
+        
+        dx, dy = (float(v) for v in self._applied_offsets()[frame_idx])
+        
+        if abs(dx) < 0.5 and abs(dy) < 0.5:
+            return frame, None  # No significant offset
+        
+        h, w = frame.shape[:2]
+        shift_x, shift_y = int(round(dx)), int(round(dy))
+        alpha = _border_alpha(h, w, shift_x, shift_y)
+        
+        if out is not None and (out.shape != frame.shape or out.dtype != frame.dtype):
+            out = None
+        
+        if abs(dx - shift_x) < 0.05 and abs(dy - shift_y) < 0.05:
+            return _shift_integer(frame, shift_x, shift_y, out), alpha
+        
+        # A constant border makes warpAffine write every output pixel, so a
+        # reused destination needs no clearing
+        M = self._M
+        M[0, 2] = dx
+        M[1, 2] = dy
+        stabilized = cv2.warpAffine(
+            frame, M, (w, h),
+            dst=out,
+            borderMode=cv2.BORDER_CONSTANT,
+            borderValue=(0, 0, 0)
+        )
+        return stabilized, alpha
+    
+    def apply_stabilization_batch(
+        self,
+        frames: Sequence[np.ndarray],
+        start_idx: int
+    ) -> List[np.ndarray]:
+        """
+        Apply stabilization to a run of consecutive frames.
+        
+        Frames whose offset is below the half-pixel threshold are found with
+        one vectorized check and passed through untouched; only the rest
+        go through apply_stabilization.
+        
+        Args:
+            frames: Consecutive BGR or BGRA frames (list or (B, H, W, C) array)
+            start_idx: Frame index of frames[0]
+            
+        Returns:
+            List of stabilized frames, in order
+        """
+        results = list(frames)
+        if not self._analyzed:
+            return results
+        
+        offsets = self._applied_offsets()[start_idx:start_idx + len(results)]
+        needs_warp = (np.abs(offsets) >= 0.5).any(axis=1)
+        
+        for i in np.flatnonzero(needs_warp):
+            results[i] = self.apply_stabilization(results[i], start_idx + int(i))
+        
+        return results
+    
     def preview_stabilization(
         self,
         frame: np.ndarray,
@@ -369,36 +1059,23 @@ class PointStabilizer:
             first_frame: First frame of video for on-the-fly tracking
             
         Returns:
-            Preview frame with stabilization applied
+            Preview frame with stabilization applied. This is the input frame
+            itself when there is nothing to shift or draw.
         """
-        result = frame.copy()
+        # Only copy once we know the frame will be modified
+        result = frame
         
         if not self.settings.bounding_box:
             return result
         
-        dx, dy = 0.0, 0.0
-        tracked_box = self.settings.bounding_box
-        
-        # Ensure reference center is set (for marker drawing)
-        if self._reference_center is None and self.settings.bounding_box:
-            x, y, w, h = self.settings.bounding_box
-            self._reference_center = (float(x + w / 2), float(y + h / 2))
-        
-        # Use pre-computed offset if available
-        if self._analyzed and frame_idx < len(self._offsets):
-            dx, dy = self._offsets[frame_idx]
-            tracked_box = self._tracking_boxes[frame_idx]
-        elif first_frame is not None and frame_idx != self.settings.reference_frame_idx:
-            # Compute offset on-the-fly by tracking from reference frame
-            offset, box = self._track_single_frame(first_frame, frame)
-            if offset:
-                dx, dy = offset
-                tracked_box = box
+        dx, dy = self._preview_offset(frame, frame_idx, first_frame)
         
         # Apply stabilization offset
         if abs(dx) > 0.5 or abs(dy) > 0.5:
             h, w = result.shape[:2]
-            M = np.float32([[1, 0, dx], [0, 1, dy]])
+            M = self._preview_M
+            M[0, 2] = dx
+            M[1, 2] = dy
             
             # Convert to BGRA for transparent borders
             if len(result.shape) < 3 or result.shape[2] == 3:
@@ -415,24 +1092,98 @@ class PointStabilizer:
             # Draw at the reference center - this is where the tracked point should be locked
             cx, cy = int(self._reference_center[0]), int(self._reference_center[1])
             
-            # Ensure we're in a drawable format
+            # Ensure we're in a drawable format, never drawing on the caller's frame
             if len(result.shape) < 3:
                 result = cv2.cvtColor(result, cv2.COLOR_GRAY2BGR)
+            elif result is frame:
+                result = frame.copy()
             
-            color = (0, 255, 255)  # Yellow in BGR
-            if result.shape[2] == 4:
-                color = (0, 255, 255, 255)
-            
-            thickness = 2
-            size = 15
-            
-            # Draw crosshair at fixed reference position
-            cv2.line(result, (cx - size, cy), (cx + size, cy), color, thickness)
-            cv2.line(result, (cx, cy - size), (cx, cy + size), color, thickness)
-            cv2.circle(result, (cx, cy), 8, color, thickness)
+            # Paste the pre-drawn crosshair at the fixed reference position,
+            # clipped to the frame
+            sprite, mask = _crosshair_sprite(result.shape[2])
+            half = sprite.shape[0] // 2
+            h, w = result.shape[:2]
+            x0, y0 = max(0, cx - half), max(0, cy - half)
+            x1, y1 = min(w, cx + half + 1), min(h, cy + half + 1)
+            if x1 > x0 and y1 > y0:
+                sx, sy = x0 - (cx - half), y0 - (cy - half)
+                region_mask = mask[sy:sy + y1 - y0, sx:sx + x1 - x0]
+                region = result[y0:y1, x0:x1]
+                region[region_mask] = sprite[sy:sy + y1 - y0, sx:sx + x1 - x0][region_mask]
         
         return result
     
+    def preview_stabilization_with_alpha(
+        self,
+        frame: np.ndarray,
+        frame_idx: int,
+        first_frame: np.ndarray = None
+    ) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """
+        Stabilize a preview frame, returning the transparent border as a separate mask.
+        
+        Same offsets as preview_stabilization, but the frame stays BGR like
+        apply_stabilization_with_alpha, so the preview needs no BGRA round trip.
+        
+        Args:
+            frame: BGR frame
+            frame_idx: Frame index
+            first_frame: First frame of video for on-the-fly tracking
+            
+        Returns:
+            Tuple of (stabilized BGR frame, border alpha mask or None if the
+            frame was not shifted)
+        """
+        if not self.settings.bounding_box:
+            return frame, None
+        
+        dx, dy = self._preview_offset(frame, frame_idx, first_frame)
+        if abs(dx) <= 0.5 and abs(dy) <= 0.5:
+            return frame, None
+        
+        h, w = frame.shape[:2]
+        shift_x, shift_y = int(round(dx)), int(round(dy))
+        alpha = _border_alpha(h, w, shift_x, shift_y)
+        
+        if abs(dx - shift_x) < 0.05 and abs(dy - shift_y) < 0.05:
+            return _shift_integer(frame, shift_x, shift_y), alpha
+        
+        # Runs on the UI thread, so use the preview matrix rather than self._M
+        M = self._preview_M
+        M[0, 2] = dx
+        M[1, 2] = dy
+        stabilized = cv2.warpAffine(
+            frame, M, (w, h),
+            borderMode=cv2.BORDER_CONSTANT,
+            borderValue=(0, 0, 0)
+        )
+        return stabilized, alpha
+    
+    def _preview_offset(
+        self,
+        frame: np.ndarray,
+        frame_idx: int,
+        first_frame: Optional[np.ndarray]
+    ) -> Tuple[float, float]:
+        """Offset for a preview frame: pre-computed if analyzed, else tracked on the fly."""
+        dx, dy = 0.0, 0.0
+        
+        # Ensure reference center is set (for marker drawing)
+        if self._reference_center is None and self.settings.bounding_box:
+            x, y, w, h = self.settings.bounding_box
+            self._reference_center = (float(x + w / 2), float(y + h / 2))
+        
+        # Use pre-computed offset if available
+        if self._analyzed and frame_idx < len(self._offsets):
+            dx, dy = self._applied_offsets()[frame_idx]
+        elif first_frame is not None and frame_idx != self.settings.reference_frame_idx:
+            # Compute offset on-the-fly by tracking from reference frame
+            offset, _ = self._track_single_frame(first_frame, frame)
+            if offset:
+                dx, dy = offset
+        
+        return float(dx), float(dy)
+    
     def _track_single_frame(
         self,
         first_frame: np.ndarray,
@@ -449,11 +1200,19 @@ class PointStabilizer:
         
         bbox = self.settings.bounding_box
         
-        # Extract template from first frame
-        template = self._extract_template(first_frame, bbox)
+        # Extract template from first frame. Scrubbing the preview passes the
+        # same (cached) reference frame every time, so keep the last template;
+        # its stable identity also lets the coarse template cache hit.
+        cached = self._preview_template
+        if cached is not None and cached[0] is first_frame and cached[1] == bbox:
+            template = cached[2]
+        else:
+            template = self._extract_template(first_frame, bbox)
+            self._preview_template = (first_frame, bbox, template)
         
         # Find template in current frame
-        matched_box = self._match_template(current_frame, template)
+        with _opencl_enabled(self._use_opencl()):
+            matched_box = self._match_template(current_frame, template)
         
         if matched_box:
             tx, ty, tw, th = matched_box
@@ -478,3 +1237,22 @@ class PointStabilizer:
         self.settings.bounding_box = None
         self._reset_analysis()
 
+
+def analyze_stabilization(
+    video_path: str,
+    settings: StabilizationSettings
+) -> Optional[PointStabilizer]:
+    """
+    Analyze one video in a fresh stabilizer.
+    
+    Module-level so it can be submitted to a ProcessPoolExecutor; the
+    returned stabilizer pickles back to the parent ready for the second pass.
+    
+    Returns:
+        The analyzed stabilizer, or None if analysis failed
+    """
+    stabilizer = PointStabilizer(settings)
+    if not stabilizer.analyze_video(video_path):
+        return None
+    return stabilizer
+
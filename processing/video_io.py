@@ -0,0 +1,129 @@
+"""
+Video input helpers shared by the processing pipeline and the preview.
+
+Opens captures with a fixed backend, decodes frames on a background
+thread and probes which GPU backends the OpenCV build supports.
+"""
+
+import queue
+import threading
+import cv2
+import numpy as np
+from typing import Iterator, Optional
+
+# CUDA is only available in custom OpenCV builds; the stock wheels
+# ship a cv2.cuda stub that reports no devices.
+try:
+    HAS_CUDA = cv2.cuda.getCudaEnabledDeviceCount() > 0
+except (AttributeError, cv2.error):
+    HAS_CUDA = False
+
+# OpenCL (T-API) lets OpenCV run on integrated or discrete GPUs without a
+# CUDA build; stock wheels report False when no driver is present.
+HAS_OPENCL = cv2.ocl.haveOpenCL()
+
+
+def open_capture(video_path: str) -> cv2.VideoCapture:
+    """
+    Open a video file with the FFmpeg backend and a one-frame capture buffer.
+    
+    Naming the backend skips OpenCV's probing of every other one; the plain
+    constructor is still tried if FFmpeg cannot open the file. Hardware
+    decoding can be requested through OpenCV's own
+    OPENCV_FFMPEG_CAPTURE_OPTIONS environment variable.
+    """
+    cap = cv2.VideoCapture(str(video_path), cv2.CAP_FFMPEG)
+    if not cap.isOpened():
+        cap.release()
+        cap = cv2.VideoCapture(str(video_path))
+    if cap.isOpened():
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+    return cap
+
+
+def read_frame_at(video_path: str, frame_number: int) -> Optional[np.ndarray]:
+    """
+    Read one frame through a capture opened and released for this call.
+    
+    Returns the BGR frame, or None if the video cannot be opened or the
+    frame cannot be read.
+    """
+    cap = open_capture(video_path)
+    try:
+        if not cap.isOpened():
+            return None
+        if frame_number > 0:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, frame_number)
+        ret, frame = cap.read()
+        return frame if ret else None
+    finally:
+        cap.release()
+
+
+class DecodeWorker(threading.Thread):
+    """
+    Decodes frames from a VideoCapture on a background thread.
+    
+    Frames are handed over through a bounded queue so decoding overlaps with
+    the consumer's per-frame work (template matching, chroma keying). Frames skipped by the stride are
+    only grabbed (demuxed, never decoded) and are yielded as None. Decoding
+    stops after `count` frames if given, otherwise at the end of the video.
+    
+    Call start(), iterate over the worker for the frames, and call stop()
+    before releasing the capture.
+    """
+    
+    _END = object()
+    
+    def __init__(
+        self,
+        cap: cv2.VideoCapture,
+        stride: int = 1,
+        maxsize: int = 8,
+        count: Optional[int] = None
+    ):
+        super().__init__(daemon=True)
+        self._cap = cap
+        self._stride = stride
+        self._count = count
+        self._queue: queue.Queue = queue.Queue(maxsize=maxsize)
+        self._stop_event = threading.Event()
+    
+    def run(self):
+        frame_idx = 0
+        try:
+            while (not self._stop_event.is_set() and
+                   (self._count is None or frame_idx < self._count) and
+                   self._cap.grab()):
+                frame = None
+                if frame_idx % self._stride == 0:
+                    ret, frame = self._cap.retrieve()
+                    if not ret:
+                        break
+                if not self._put(frame):
+                    return
+                frame_idx += 1
+        finally:
+            self._put(self._END)
+    
+    def _put(self, item) -> bool:
+        """Block until the item is queued; give up if the worker is stopped."""
+        while not self._stop_event.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+    
+    def __iter__(self) -> Iterator[Optional[np.ndarray]]:
+        while True:
+            item = self._queue.get()
+            if item is self._END:
+                return
+            yield item
+    
+    def stop(self):
+        """Stop decoding and wait for the thread, so the capture can be released."""
+        self._stop_event.set()
+        self.join()
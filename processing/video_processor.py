@@ -5,13 +5,17 @@ Video processing with proper resource management and cancellation support.
 import cv2
 import numpy as np
 import imageio
+import os
+import queue
 import threading
+import time
 from pathlib import Path
-from typing import Optional, Callable, Tuple
+from typing import Any, Optional, Callable, Tuple
 from dataclasses import dataclass
 
-from processing.chroma_key import ChromaKeyProcessor, ChromaKeySettings
+from processing.chroma_key import ChromaKeyProcessor, ChromaKeySettings, zero_transparent
 from processing.stabilizer import PointStabilizer
+from processing.video_io import DecodeWorker, open_capture, read_frame_at
 from utils.logger import logger, ProcessingStats
 from utils.validators import (
     validate_video_path, 
@@ -28,8 +32,113 @@ class ProcessingOptions:
     target_fps: Optional[float] = None  # None = use source FPS
     stabilizer: Optional[PointStabilizer] = None  # Stabilizer with tracking point set
     resize_width: Optional[int] = None  # Target output width (height scales to maintain aspect ratio)
+    cpu_used: int = 4  # libvpx speed/quality trade-off (0 = slowest, best quality)
 
 
+# Frames buffered between the decode, chroma key and encode stages
+PIPELINE_DEPTH = 4
+
+# PNG deflate releases the GIL, so image sequences are encoded by several threads
+PNG_WRITERS = max(1, (os.cpu_count() or 2) // 2)
+
+# Minimum time between progress callbacks during an export, in seconds
+PROGRESS_INTERVAL = 0.1
+
+
+def _frame_stride(source_fps: float, target_fps: Optional[float]) -> int:
+    """Keep every Nth source frame to reach a lower target frame rate."""
+    if not target_fps or target_fps <= 0 or source_fps <= 0:
+        return 1
+    return max(1, int(round(source_fps / target_fps)))
+
+
+class _FrameWriter(threading.Thread):
+    """
+    Writes processed frames on a background thread.
+    
+    Frames are handed over through a bounded queue so encoding overlaps with
+    decoding and chroma keying. A write error is raised again in the
+    producing thread on its next put() or on close().
+    
+    A queued item must not be modified until its write has finished. With a
+    single worker, items finish in queue order, so a caller can rotate
+    through maxsize + 2 buffers (queued, being written, being filled). With
+    workers > 1, extra threads consume the same queue and items finish out
+    of order. That suits independent files such as PNG frames, but callers
+    that recycle buffers must wait for on_written, which is called with each
+    item once it has been written or discarded.
+    """
+    
+    _END = object()
+    
+    def __init__(
+        self,
+        write: Callable[[Any], None],
+        maxsize: int = PIPELINE_DEPTH,
+        workers: int = 1,
+        on_written: Optional[Callable[[Any], None]] = None
+    ):
+        super().__init__(daemon=True)
+        self._write = write
+        self._on_written = on_written
+        self._queue: queue.Queue = queue.Queue(maxsize=maxsize)
+        self._stop_event = threading.Event()
+        self._error: Optional[BaseException] = None
+        self._helpers = [
+            threading.Thread(target=self.run, daemon=True)
+            for _ in range(max(1, workers) - 1)
+        ]
+    
+    def start(self):
+        super().start()
+        for helper in self._helpers:
+            helper.start()
+    
+    def run(self):
+        while True:
+            item = self._queue.get()
+            if item is self._END:
+                return
+            try:
+                # After an error or abort, only drain the queue
+                if self._error is None and not self._stop_event.is_set():
+                    self._write(item)
+            except BaseException as e:
+                self._error = e
+            finally:
+                if self._on_written is not None:
+                    self._on_written(item)
+    
+    def put(self, item):
+        """Queue an item for writing, blocking while the queue is full."""
+        while True:
+            if self._error is not None:
+                raise self._error
+            try:
+                self._queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+    
+    def close(self):
+        """Write everything still queued, wait for the threads, and raise any write error."""
+        self._join_all()
+        if self._error is not None:
+            raise self._error
+    
+    def abort(self):
+        """Discard queued items and wait for the threads, so the writer can be closed."""
+        self._stop_event.set()
+        self._join_all()
+    
+    def _join_all(self):
+        # One end marker per consuming thread
+        for _ in range(len(self._helpers) + 1):
+            self._queue.put(self._END)
+        self.join()
+        for helper in self._helpers:
+            helper.join()
+
 
 class VideoProcessor:
     """
@@ -60,7 +169,7 @@ class VideoProcessor:
         """
         path = validate_video_path(video_path)
         
-        cap = cv2.VideoCapture(str(path))
+        cap = open_capture(str(path))
         if not cap.isOpened():
             raise ValidationError(f"Cannot open video: {video_path}")
         
@@ -87,16 +196,7 @@ class VideoProcessor:
         Returns:
             BGR frame or None if failed
         """
-        cap = cv2.VideoCapture(str(video_path))
-        if not cap.isOpened():
-            return None
-        
-        try:
-            cap.set(cv2.CAP_PROP_POS_FRAMES, frame_number)
-            ret, frame = cap.read()
-            return frame if ret else None
-        finally:
-            cap.release()
+        return read_frame_at(str(video_path), frame_number)
     
     def process(
         self,
@@ -125,6 +225,8 @@ class VideoProcessor:
         
         cap = None
         writer = None
+        reader = None
+        frame_writer = None
         
         try:
             # Validate paths
@@ -134,16 +236,21 @@ class VideoProcessor:
             logger.info(f"Opening video: {input_file.name}")
             
             # Open video
-            cap = cv2.VideoCapture(str(input_file))
+            cap = open_capture(str(input_file))
             if not cap.isOpened():
                 raise ValidationError("Failed to open video file")
             
             # Get video properties
-            fps = options.target_fps or cap.get(cv2.CAP_PROP_FPS)
+            source_fps = cap.get(cv2.CAP_PROP_FPS)
+            fps = options.target_fps or source_fps
             total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
             frame_width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
             frame_height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
             
+            # A lower target frame rate keeps every Nth source frame
+            frame_stride = _frame_stride(source_fps, options.target_fps)
+            total_frames = -(-total_frames // frame_stride)
+            
             # Validate and apply crop
             if options.crop:
                 crop = validate_crop_region(
@@ -156,6 +263,10 @@ class VideoProcessor:
                 output_width = frame_width
                 output_height = frame_height
             
+            # Stabilization output buffer, reused for every frame
+            stab_buffer = np.empty((frame_height, frame_width, 3), dtype=np.uint8)
+            keyed_shape = (output_height, output_width, 4)
+            
             # Calculate final dimensions if resizing
             target_size = None
             if options.resize_width and options.resize_width < output_width:
@@ -171,6 +282,19 @@ class VideoProcessor:
                 logger.info(f"Output will be resized to: {target_width}x{target_height}")
                 output_width, output_height = target_width, target_height
             
+            # Output buffers, used in turn: frames queued for the encoder
+            # (plus the one being encoded) must not be overwritten. When
+            # resizing, only the resized frame is queued, so the chroma key
+            # output needs a single buffer.
+            output_buffers = [
+                np.empty((output_height, output_width, 4), dtype=np.uint8)
+                for _ in range(PIPELINE_DEPTH + 2)
+            ]
+            if target_size:
+                rgba_buffers = [np.empty(keyed_shape, dtype=np.uint8)]
+            else:
+                rgba_buffers = output_buffers
+            
             # Initialize stats
             self.stats.start(total_frames)
             
@@ -199,7 +323,16 @@ class VideoProcessor:
             # Standard transparent output (WebM VP9)
             codec = 'libvpx-vp9'
             pixelformat = 'yuva420p'
-            output_params = ['-auto-alt-ref', '0']  # Preserve transparency
+            output_params = [
+                '-auto-alt-ref', '0',  # Preserve transparency
+                '-deadline', 'good',
+                '-cpu-used', str(options.cpu_used),
+                # Row and tile multithreading let libvpx use every core
+                '-row-mt', '1',
+                '-tile-columns', '2',
+                '-threads', str(os.cpu_count() or 1),
+                '-lag-in-frames', '16',
+            ]
             final_output_width = output_width
             final_output_height = output_height
             logger.info("Using user transparent export (WebM VP9)")
@@ -213,28 +346,33 @@ class VideoProcessor:
                 output_params=output_params
             )
             
+            # Decode and encode on background threads so both overlap with
+            # the chroma key work on this thread. Frames dropped by the stride
+            # are only grabbed, never decoded, and arrive as None.
+            reader = DecodeWorker(cap, frame_stride, maxsize=PIPELINE_DEPTH)
+            reader.start()
+            frame_writer = _FrameWriter(writer.append_data)
+            frame_writer.start()
+            
             frame_count = 0
+            next_progress = 0.0
             
-            while cap.isOpened():
+            for source_idx, frame in enumerate(reader):
                 # Check for cancellation
                 if self._cancel_event.is_set():
                     logger.warning("Processing cancelled by user")
                     return False
                 
-                ret, frame = cap.read()
-                if not ret:
-                    break
+                if frame is None:
+                    continue
                 
                 # Apply stabilization FIRST on full frame
                 if stabilizer:
-                    frame = stabilizer.apply_stabilization(frame, frame_count)
-                    # Convert back to BGR if stabilizer returned BGRA
-                    if len(frame.shape) > 2 and frame.shape[2] == 4:
-                        # Keep alpha for later merge, but process BGR
-                        stab_alpha = frame[:, :, 3]
-                        frame = cv2.cvtColor(frame, cv2.COLOR_BGRA2BGR)
-                    else:
-                        stab_alpha = None
+                    # Frame stays BGR; transparent borders come back as a
+                    # separate alpha mask for the later merge
+                    frame, stab_alpha = stabilizer.apply_stabilization_with_alpha(
+                        frame, source_idx, out=stab_buffer
+                    )
                 else:
                     stab_alpha = None
                 
@@ -246,35 +384,44 @@ class VideoProcessor:
                     if stab_alpha is not None:
                         stab_alpha = stab_alpha[y:y+h, x:x+w]
                 
-                # Process frame with chroma key
-                rgba = processor.process_frame(frame)
-                
-                # Merge stabilization alpha (transparent borders) with chroma key alpha
-                if stab_alpha is not None:
-                    rgba[:, :, 3] = cv2.bitwise_and(rgba[:, :, 3], stab_alpha)
+                # Process frame with chroma key; stabilization alpha
+                # (transparent borders) is merged into the key's alpha plane.
+                # Optimization: Zero out RGB values for fully transparent pixels
+                # This significantly improves compression efficiency for the output video
+                # Without a resize this is done inside process_frame as well.
+                rgba_buffer = rgba_buffers[frame_count % len(rgba_buffers)]
+                rgba = processor.process_frame(
+                    frame, out=rgba_buffer, alpha=stab_alpha,
+                    clear_transparent=not target_size
+                )
                 
                 # Resize if needed
                 if target_size:
-                    rgba = cv2.resize(rgba, target_size, interpolation=cv2.INTER_AREA)
-                
-                # Optimization: Zero out RGB values for fully transparent pixels
-                # This significantly improves compression efficiency for the output video
-                transparent_mask = rgba[:, :, 3] == 0
-                rgba[transparent_mask] = [0, 0, 0, 0]
+                    rgba = cv2.resize(
+                        rgba, target_size,
+                        dst=output_buffers[frame_count % len(output_buffers)],
+                        interpolation=cv2.INTER_AREA
+                    )
+                    zero_transparent(rgba)
 
                 # Write frame
-                writer.append_data(rgba)
+                frame_writer.put(rgba)
                 
                 frame_count += 1
                 self.stats.update(frame_count)
                 
-                # Report progress
-                if progress_callback and frame_count % 5 == 0:
+                # Report progress, throttled so fast exports don't flood the GUI
+                if progress_callback and time.monotonic() >= next_progress:
+                    next_progress = time.monotonic() + PROGRESS_INTERVAL
                     progress = frame_count / total_frames
                     eta = self.stats.eta_seconds
                     eta_str = f"{int(eta)}s remaining" if eta > 0 else ""
                     progress_callback(progress, eta_str)
             
+            # Flush the frames still queued for the encoder
+            frame_writer.close()
+            frame_writer = None
+            
             self.stats.finish()
             logger.success(
                 f"Processing complete: {frame_count} frames in {self.stats.duration:.1f}s "
@@ -293,7 +440,12 @@ class VideoProcessor:
             logger.error(f"Processing failed: {e}")
             raise
         finally:
-            # Clean up resources
+            # Clean up resources. Stop the pipeline threads first: they use
+            # the capture and the writer.
+            if reader is not None:
+                reader.stop()
+            if frame_writer is not None:
+                frame_writer.abort()
             if cap is not None:
                 cap.release()
             if writer is not None:
@@ -329,6 +481,8 @@ class VideoProcessor:
         self._is_processing = True
         
         cap = None
+        reader = None
+        frame_writer = None
         
         try:
             # Validate input
@@ -342,7 +496,7 @@ class VideoProcessor:
             logger.info(f"Output folder: {output_path_obj} (Format: PNG)")
             
             # Open video
-            cap = cv2.VideoCapture(str(input_file))
+            cap = open_capture(str(input_file))
             if not cap.isOpened():
                 raise ValidationError("Failed to open video file")
             
@@ -351,6 +505,10 @@ class VideoProcessor:
             frame_width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
             frame_height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
             
+            # A lower target frame rate keeps every Nth source frame
+            frame_stride = _frame_stride(cap.get(cv2.CAP_PROP_FPS), options.target_fps)
+            total_frames = -(-total_frames // frame_stride)
+            
             # Validate and apply crop
             if options.crop:
                 crop = validate_crop_region(
@@ -363,6 +521,10 @@ class VideoProcessor:
                 output_width = frame_width
                 output_height = frame_height
             
+            # Stabilization output buffer, reused for every frame
+            stab_buffer = np.empty((frame_height, frame_width, 3), dtype=np.uint8)
+            keyed_shape = (output_height, output_width, 4)
+            
             # Calculate final dimensions if resizing
             target_size = None
             if options.resize_width and options.resize_width < output_width:
@@ -371,6 +533,19 @@ class VideoProcessor:
                 target_height = int(output_height * scale)
                 target_size = (target_width, target_height)
                 logger.info(f"Output will be resized to: {target_width}x{target_height}")
+                output_width, output_height = target_width, target_height
+            
+            # Output buffers. The PNG writers finish out of order, so a buffer
+            # goes back on this free list only once its frame has been
+            # written; the loop takes the next one from here. When resizing,
+            # only the resized frame is queued, so the chroma key output
+            # needs a single buffer.
+            png_queue_size = 2 * PNG_WRITERS
+            free_buffers: queue.Queue = queue.Queue()
+            for _ in range(png_queue_size + PNG_WRITERS + 1):
+                free_buffers.put(np.empty((output_height, output_width, 4), dtype=np.uint8))
+            if target_size:
+                key_buffer = np.empty(keyed_shape, dtype=np.uint8)
             
             # Initialize stats
             self.stats.start(total_frames)
@@ -396,26 +571,36 @@ class VideoProcessor:
             
             logger.info(f"Exporting {total_frames} frames as PNG sequence...")
             
+            # Decode and PNG-encode on background threads so both overlap
+            # with the chroma key work on this thread. Frames dropped by the
+            # stride are only grabbed, never decoded, and arrive as None.
+            reader = DecodeWorker(cap, frame_stride, maxsize=PIPELINE_DEPTH)
+            reader.start()
+            frame_writer = _FrameWriter(
+                lambda item: cv2.imwrite(*item),
+                maxsize=png_queue_size,
+                workers=PNG_WRITERS,
+                on_written=lambda item: free_buffers.put(item[1])
+            )
+            frame_writer.start()
+            
             frame_count = 0
+            next_progress = 0.0
             
-            while cap.isOpened():
+            for source_idx, frame in enumerate(reader):
                 # Check for cancellation
                 if self._cancel_event.is_set():
                     logger.warning("Export cancelled by user")
                     return False
                 
-                ret, frame = cap.read()
-                if not ret:
-                    break
+                if frame is None:
+                    continue
                 
                 # Apply stabilization FIRST on full frame
                 if stabilizer:
-                    frame = stabilizer.apply_stabilization(frame, frame_count)
-                    if len(frame.shape) > 2 and frame.shape[2] == 4:
-                        stab_alpha = frame[:, :, 3]
-                        frame = cv2.cvtColor(frame, cv2.COLOR_BGRA2BGR)
-                    else:
-                        stab_alpha = None
+                    frame, stab_alpha = stabilizer.apply_stabilization_with_alpha(
+                        frame, source_idx, out=stab_buffer
+                    )
                 else:
                     stab_alpha = None
                 
@@ -426,39 +611,46 @@ class VideoProcessor:
                     if stab_alpha is not None:
                         stab_alpha = stab_alpha[y:y+h, x:x+w]
                 
-                # Process frame with chroma key
-                rgba = processor.process_frame(frame)
-                
-                # Merge stabilization alpha with chroma key alpha
-                if stab_alpha is not None:
-                    rgba[:, :, 3] = cv2.bitwise_and(rgba[:, :, 3], stab_alpha)
+                # Process frame with chroma key; stabilization alpha is
+                # merged into the key's alpha plane.
+                # Optimization: Zero out RGB for fully transparent pixels
+                # Without a resize this is done inside process_frame as well.
+                # Output is BGRA, which OpenCV's PNG writer expects.
+                output_buffer = free_buffers.get()
+                bgra = processor.process_frame(
+                    frame, out=key_buffer if target_size else output_buffer,
+                    alpha=stab_alpha, clear_transparent=not target_size, bgra=True
+                )
                 
                 # Resize if needed
                 if target_size:
-                    rgba = cv2.resize(rgba, target_size, interpolation=cv2.INTER_AREA)
-                
-                # Optimization: Zero out RGB for fully transparent pixels
-                transparent_mask = rgba[:, :, 3] == 0
-                rgba[transparent_mask] = [0, 0, 0, 0]
+                    bgra = cv2.resize(
+                        bgra, target_size, dst=output_buffer,
+                        interpolation=cv2.INTER_AREA
+                    )
+                    zero_transparent(bgra)
                 
                 # Save frame
                 frame_filename = output_path_obj / f"frame_{str(frame_count).zfill(num_digits)}.png"
                 
                 # Use OpenCV for PNG (faster, standard)
-                # Convert RGBA to BGRA for OpenCV save
-                bgra = cv2.cvtColor(rgba, cv2.COLOR_RGBA2BGRA)
-                cv2.imwrite(str(frame_filename), bgra)
+                frame_writer.put((str(frame_filename), bgra))
                 
                 frame_count += 1
                 self.stats.update(frame_count)
                 
-                # Report progress
-                if progress_callback and frame_count % 5 == 0:
+                # Report progress, throttled so fast exports don't flood the GUI
+                if progress_callback and time.monotonic() >= next_progress:
+                    next_progress = time.monotonic() + PROGRESS_INTERVAL
                     progress = frame_count / total_frames
                     eta = self.stats.eta_seconds
                     eta_str = f"{int(eta)}s remaining" if eta > 0 else ""
                     progress_callback(progress, eta_str)
             
+            # Write the frames still queued
+            frame_writer.close()
+            frame_writer = None
+            
             self.stats.finish()
             logger.success(
                 f"Export complete: {frame_count} PNG frames in {self.stats.duration:.1f}s "
@@ -477,6 +669,10 @@ class VideoProcessor:
             logger.error(f"Export failed: {e}")
             raise
         finally:
+            if reader is not None:
+                reader.stop()
+            if frame_writer is not None:
+                frame_writer.abort()
             if cap is not None:
                 cap.release()
             self._is_processing = False
@@ -0,0 +1,44 @@
+"""
+Tests for ChromaKeyProcessor.
+"""
+
+import numpy as np
+
+from processing.chroma_key import ChromaKeyProcessor, ChromaKeySettings
+
+
+def _green_frame_with_subject(height: int = 48, width: int = 64) -> np.ndarray:
+    """BGR frame: green screen with a red square in the middle."""
+    frame = np.zeros((height, width, 3), dtype=np.uint8)
+    frame[:] = (40, 200, 60)
+    frame[height // 4:3 * height // 4, width // 4:3 * width // 4] = (60, 60, 200)
+    return frame
+
+
+def test_process_frame_writes_into_contiguous_out():
+    processor = ChromaKeyProcessor(ChromaKeySettings())
+    frame = _green_frame_with_subject()
+    out = np.empty(frame.shape[:2] + (4,), dtype=np.uint8)
+    
+    result = processor.process_frame(frame, out=out)
+    
+    assert result is out
+    np.testing.assert_array_equal(result, processor.process_frame(frame))
+
+
+def test_process_frame_ignores_non_contiguous_out():
+    processor = ChromaKeyProcessor(ChromaKeySettings())
+    frame = _green_frame_with_subject()
+    h, w = frame.shape[:2]
+    
+    # Right shape and dtype, but a view into a larger canvas
+    canvas = np.zeros((h, w + 16, 4), dtype=np.uint8)
+    out = canvas[:, 8:8 + w]
+    assert out.shape == (h, w, 4) and not out.flags.c_contiguous
+    
+    result = processor.process_frame(frame, out=out)
+    
+    assert result is not out
+    assert result.flags.c_contiguous
+    np.testing.assert_array_equal(result, processor.process_frame(frame))
+    assert not canvas.any()
@@ -0,0 +1,42 @@
+"""
+Tests for VideoProcessor.
+"""
+
+import cv2
+import numpy as np
+import pytest
+
+from processing.video_processor import VideoProcessor
+
+
+FRAME_COUNT = 8
+
+
+@pytest.fixture
+def video_path(tmp_path):
+    """Short MJPG clip whose frame i is a flat gray of level 20 * i."""
+    path = tmp_path / "clip.avi"
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"MJPG"), 10, (64, 48))
+    if not writer.isOpened():
+        pytest.skip("MJPG writer not available")
+    for i in range(FRAME_COUNT):
+        writer.write(np.full((48, 64, 3), 20 * i, dtype=np.uint8))
+    writer.release()
+    return str(path)
+
+
+def test_get_frame_at_reads_requested_frame(video_path):
+    processor = VideoProcessor()
+    
+    for frame_number in (5, 2, 0):
+        frame = processor.get_frame_at(video_path, frame_number)
+        assert frame is not None and frame.shape == (48, 64, 3)
+        assert abs(float(frame.mean()) - 20 * frame_number) < 4
+
+
+def test_get_frame_at_returns_none_past_end(video_path):
+    assert VideoProcessor().get_frame_at(video_path, FRAME_COUNT + 5) is None
+
+
+def test_get_frame_at_returns_none_for_missing_file(tmp_path):
+    assert VideoProcessor().get_frame_at(str(tmp_path / "missing.avi"), 0) is None
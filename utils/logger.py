@@ -4,6 +4,7 @@ Logging utilities for the Green Screen Remover application.
 
 import logging
 import sys
+import time
 from datetime import datetime
 from pathlib import Path
 from typing import Optional, Callable
@@ -16,22 +17,23 @@ class ProcessingStats:
         self.reset()
     
     def reset(self):
-        self.start_time: Optional[datetime] = None
-        self.end_time: Optional[datetime] = None
+        # time.monotonic() readings: cheap, and immune to wall-clock jumps
+        self.start_time: Optional[float] = None
+        self.end_time: Optional[float] = None
         self.total_frames: int = 0
         self.processed_frames: int = 0
         self.errors: list[str] = []
     
     def start(self, total_frames: int):
         self.reset()
-        self.start_time = datetime.now()
+        self.start_time = time.monotonic()
         self.total_frames = total_frames
     
     def update(self, processed: int):
         self.processed_frames = processed
     
     def finish(self):
-        self.end_time = datetime.now()
+        self.end_time = time.monotonic()
     
     def add_error(self, error: str):
         self.errors.append(error)
@@ -39,10 +41,10 @@ class ProcessingStats:
     @property
     def duration(self) -> float:
         """Get processing duration in seconds."""
-        if not self.start_time:
+        if self.start_time is None:
             return 0
-        end = self.end_time or datetime.now()
-        return (end - self.start_time).total_seconds()
+        end = self.end_time if self.end_time is not None else time.monotonic()
+        return end - self.start_time
     
     @property
     def fps(self) -> float:
@@ -68,7 +70,12 @@ class ProcessingStats:
 
 
 class AppLogger:
-    """Application logger with optional GUI callback."""
+    """
+    Application logger with optional GUI callback.
+    
+    Messages accept %-style arguments, formatted only when a handler or the
+    GUI actually needs the text, e.g. ``logger.debug("frame %d", idx)``.
+    """
     
     def __init__(self, name: str = "ChromaKey"):
         self.logger = logging.getLogger(name)
@@ -102,31 +109,35 @@ class AppLogger:
         """Set callback for GUI status updates. Callback receives (level, message)."""
         self._gui_callback = callback
     
-    def _notify_gui(self, level: str, message: str):
+    def _notify_gui(self, level: str, message: str, args: tuple = ()):
         if self._gui_callback:
             try:
-                self._gui_callback(level, message)
+                self._gui_callback(level, message % args if args else message)
             except Exception:
                 pass
     
-    def debug(self, message: str):
-        self.logger.debug(message)
+    def is_enabled_for(self, level: int) -> bool:
+        """Whether a message at this logging level would be emitted."""
+        return self.logger.isEnabledFor(level)
+    
+    def debug(self, message: str, *args):
+        self.logger.debug(message, *args)
     
-    def info(self, message: str):
-        self.logger.info(message)
-        self._notify_gui("INFO", message)
+    def info(self, message: str, *args):
+        self.logger.info(message, *args)
+        self._notify_gui("INFO", message, args)
     
-    def warning(self, message: str):
-        self.logger.warning(message)
-        self._notify_gui("WARNING", message)
+    def warning(self, message: str, *args):
+        self.logger.warning(message, *args)
+        self._notify_gui("WARNING", message, args)
     
-    def error(self, message: str):
-        self.logger.error(message)
-        self._notify_gui("ERROR", message)
+    def error(self, message: str, *args):
+        self.logger.error(message, *args)
+        self._notify_gui("ERROR", message, args)
     
-    def success(self, message: str):
-        self.logger.info(message)
-        self._notify_gui("SUCCESS", message)
+    def success(self, message: str, *args):
+        self.logger.info(message, *args)
+        self._notify_gui("SUCCESS", message, args)
 
 
 # Global logger instance
@@ -6,8 +6,14 @@ import os
 from pathlib import Path
 from typing import Optional, Tuple
 
-SUPPORTED_VIDEO_FORMATS = (".mp4", ".avi", ".mov", ".mkv", ".webm", ".m4v")
-SUPPORTED_OUTPUT_FORMATS = (".webm", ".png")
+import numpy as np
+
+# Frozensets: only ever used for membership tests
+SUPPORTED_VIDEO_FORMATS = frozenset({".mp4", ".avi", ".mov", ".mkv", ".webm", ".m4v"})
+SUPPORTED_OUTPUT_FORMATS = frozenset({".webm", ".png"})
+
+# Listing for error messages, joined once
+_SUPPORTED_VIDEO_FORMATS_MSG = ", ".join(sorted(SUPPORTED_VIDEO_FORMATS))
 
 
 class ValidationError(Exception):
@@ -31,21 +37,55 @@ def validate_video_path(path: str) -> Path:
     if not path:
         raise ValidationError("No video file specified")
     
-    video_path = Path(path)
+    # The suffix check needs no disk access, so it runs first, on the plain
+    # string
+    _check_video_suffix(path)
     
-    if not video_path.exists():
+    # One isfile() query answers both "does it exist" and "is it a file"
+    # (on Windows it avoids opening the file that a full stat() needs); the
+    # failure path asks again only to pick the error message
+    if not os.path.isfile(path):
+        if os.path.exists(path):
+            raise ValidationError(f"Path is not a file: {path}")
         raise ValidationError(f"Video file not found: {path}")
     
-    if not video_path.is_file():
-        raise ValidationError(f"Path is not a file: {path}")
+    return Path(path)
+
+
+def validate_video_path_from_entry(entry: os.DirEntry) -> Path:
+    """
+    Validate a video file found by os.scandir().
+    
+    Same checks as validate_video_path, but the file type comes from the
+    directory entry, which scandir usually already read, so most platforms
+    need no extra stat() per file.
     
-    if video_path.suffix.lower() not in SUPPORTED_VIDEO_FORMATS:
+    Args:
+        entry: Directory entry from os.scandir()
+        
+    Returns:
+        Validated Path object
+        
+    Raises:
+        ValidationError: If validation fails
+    """
+    _check_video_suffix(entry.name)
+    
+    if not entry.is_file():
+        raise ValidationError(f"Path is not a file: {entry.path}")
+    
+    return Path(entry.path)
+
+
+def _check_video_suffix(path: str) -> None:
+    """Raise ValidationError unless path ends in a supported video suffix."""
+    suffix = os.path.splitext(path)[1]
+    # Suffixes are usually lowercase already, so only lowercase on a miss
+    if suffix not in SUPPORTED_VIDEO_FORMATS and suffix.lower() not in SUPPORTED_VIDEO_FORMATS:
         raise ValidationError(
-            f"Unsupported video format: {video_path.suffix}\n"
-            f"Supported formats: {', '.join(SUPPORTED_VIDEO_FORMATS)}"
+            f"Unsupported video format: {suffix}\n"
+            f"Supported formats: {_SUPPORTED_VIDEO_FORMATS_MSG}"
         )
-    
-    return video_path
 
 
 def validate_output_path(path: str) -> Path:
@@ -64,13 +104,20 @@ def validate_output_path(path: str) -> Path:
     if not path:
         raise ValidationError("No output path specified")
     
-    output_path = Path(path)
+    # Plain os.path string operations; the Path is only built for the result.
+    # Validate extension first so a bad name never creates directories.
+    suffix = os.path.splitext(path)[1]
+    if suffix not in SUPPORTED_OUTPUT_FORMATS and suffix.lower() not in SUPPORTED_OUTPUT_FORMATS:
+        raise ValidationError(
+            f"Output must be WebM or PNG format.\n"
+            f"Got: {suffix}"
+        )
     
     # Check directory exists or can be created
-    parent = output_path.parent
-    if not parent.exists():
+    parent = os.path.dirname(path) or os.curdir
+    if not os.path.isdir(parent):
         try:
-            parent.mkdir(parents=True, exist_ok=True)
+            os.makedirs(parent, exist_ok=True)
         except OSError as e:
             raise ValidationError(f"Cannot create output directory: {e}")
     
@@ -78,14 +125,7 @@ def validate_output_path(path: str) -> Path:
     if not os.access(parent, os.W_OK):
         raise ValidationError(f"No write permission for: {parent}")
     
-    # Validate extension
-    if output_path.suffix.lower() not in SUPPORTED_OUTPUT_FORMATS:
-        raise ValidationError(
-            f"Output must be WebM or PNG format.\n"
-            f"Got: {output_path.suffix}"
-        )
-    
-    return output_path
+    return Path(path)
 
 
 def validate_hsv_range(
@@ -102,25 +142,41 @@ def validate_hsv_range(
     Raises:
         ValidationError: If values are out of range
     """
-    # Hue: 0-179 in OpenCV
-    if not (0 <= h_min <= 179):
-        raise ValidationError(f"H min must be 0-179, got: {h_min}")
-    if not (0 <= h_max <= 179):
-        raise ValidationError(f"H max must be 0-179, got: {h_max}")
-    
-    # Saturation and Value: 0-255
-    if not (0 <= s_min <= 255):
-        raise ValidationError(f"S min must be 0-255, got: {s_min}")
-    if not (0 <= s_max <= 255):
-        raise ValidationError(f"S max must be 0-255, got: {s_max}")
-    if not (0 <= v_min <= 255):
-        raise ValidationError(f"V min must be 0-255, got: {v_min}")
-    if not (0 <= v_max <= 255):
-        raise ValidationError(f"V max must be 0-255, got: {v_max}")
+    # Hue: 0-179 in OpenCV; Saturation and Value: 0-255
+    for name, value, upper in (
+        ("H min", h_min, 179), ("H max", h_max, 179),
+        ("S min", s_min, 255), ("S max", s_max, 255),
+        ("V min", v_min, 255), ("V max", v_max, 255),
+    ):
+        if not (0 <= value <= upper):
+            raise ValidationError(f"{name} must be 0-{upper}, got: {value}")
     
     return ((h_min, s_min, v_min), (h_max, s_max, v_max))
 
 
+def validate_hsv_ranges_batch(ranges: np.ndarray) -> np.ndarray:
+    """
+    Check many HSV ranges at once, e.g. every step of a slider sweep.
+    
+    Args:
+        ranges: (N, 6) array of rows in validate_hsv_range's argument order:
+                (h_min, h_max, s_min, s_max, v_min, v_max)
+        
+    Returns:
+        (N,) bool array, True where every value of the row is in range
+        
+    Raises:
+        ValidationError: If the array does not have 6 columns
+    """
+    ranges = np.asarray(ranges)
+    if ranges.ndim != 2 or ranges.shape[1] != 6:
+        raise ValidationError(f"Expected an (N, 6) array of HSV ranges, got shape {ranges.shape}")
+    
+    # Hue: 0-179 in OpenCV; saturation and value: 0-255
+    upper = np.array([179, 179, 255, 255, 255, 255])
+    return ((ranges >= 0) & (ranges <= upper)).all(axis=1)
+
+
 def validate_crop_region(
     x: int, y: int, width: int, height: int,
     frame_width: int, frame_height: int
@@ -131,22 +187,39 @@ def validate_crop_region(
     Returns:
         Validated (x, y, width, height) tuple
     """
-    # Clamp to valid ranges
-    x = max(0, min(x, frame_width - 1))
-    y = max(0, min(y, frame_height - 1))
+    # Clamp to valid ranges. Plain comparisons: this is called with
+    # scalars, where the max()/min() builtin calls cost more than the work.
+    if x > frame_width - 1:
+        x = frame_width - 1
+    if x < 0:
+        x = 0
+    if y > frame_height - 1:
+        y = frame_height - 1
+    if y < 0:
+        y = 0
     
     # Ensure minimum size of 1
-    width = max(1, min(width, frame_width - x))
-    height = max(1, min(height, frame_height - y))
+    if width > frame_width - x:
+        width = frame_width - x
+    if width < 1:
+        width = 1
+    if height > frame_height - y:
+        height = frame_height - y
+    if height < 1:
+        height = 1
     
     return (x, y, width, height)
 
 
 def validate_feather_amount(feather: int) -> int:
     """Validate feather amount (0-20 pixels)."""
-    return max(0, min(20, feather))
+    if feather < 0:
+        return 0
+    return feather if feather <= 20 else 20
 
 
 def validate_spill_suppression(amount: float) -> float:
     """Validate spill suppression amount (0.0-1.0)."""
-    return max(0.0, min(1.0, amount))
+    if amount < 0.0:
+        return 0.0
+    return float(amount) if amount <= 1.0 else 1.0